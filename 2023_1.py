@@ -2,12 +2,21 @@
 from maix import image, camera, display
 import time, math, pyb
 import numpy as np
+from path_planner import PathPlanner
+from state_machine import StateMachine
+# 跟踪器、叠加层等共用模块只在 Source 包中保留一份
+from Source.tracker import MultiTargetTracker
+from Source.overlay import Overlay
+from Source.pipeline import Pipeline
+from Source.nodes import CaptureNode, ClockNode, SerialNode, TrackNode, ModeNode, OverlayNode, DisplayNode
 
 # ===== 初始化硬件 =====
 # MaixCam摄像头初始化
 cam = camera.Camera(320, 240)
 cam.skip_frames(30)  # 跳过初始30帧
 disp = display.Display()
+HEADLESS = False   # 无头模式：不绘制、不刷新屏幕（比赛时使用）
+overlay = Overlay(HEADLESS)
 
 # 其他硬件初始化
 clock = time.clock()
@@ -16,15 +25,21 @@ led = pyb.LED(1)
 
 # 全局变量
 track_path = []
-MODE = "None"
-current_target = 0
-cmd = "None"
 last_spot = (0, 0)
 
 # 颜色阈值配置 (Maix格式: [L, A, B])
 RED_THRESHOLD = [0, 80, 40, 80, 10, 80]  # 红色激光点
 BLACK_THRESHOLD = [0, 40, -20, 20, -20, 20]  # 黑色标记
 
+# 路径参数
+PATH_SPEED = 40          # 目标点移动速度（像素/秒）
+CORNER_RADIUS = 0        # 拐角圆角半径（像素）
+TRACK_TOLERANCE = 6      # 激光点偏离目标超过该距离时暂停推进
+border_t = 0.0           # 边线路径已走过的时间（秒）
+reset_t = 0.0            # 复位路径已走过的时间（秒）
+path = None              # 边线路径（进入 BORDER 模式时生成）
+path_origin = None       # 复位路径（进入 RESET 模式时生成）
+
 # 校准参数
 border_points = []  # 保存的边线点坐标
 origin_point = None  # 原点坐标
@@ -99,8 +114,8 @@ def find_red_spot(img):
         # 选择最大色块
         blob = max(blobs, key=lambda b: b[2]*b[3])
         # 绘制十字标记
-        img.draw_rect(blob[0], blob[1], blob[2], blob[3], image.COLOR_RED)
-        img.draw_cross(blob[0]+blob[2]//2, blob[1]+blob[3]//2, image.COLOR_RED)
+        overlay.draw_rect(blob[0], blob[1], blob[2], blob[3], image.COLOR_RED)
+        overlay.draw_cross(blob[0]+blob[2]//2, blob[1]+blob[3]//2, image.COLOR_RED)
         return (blob[0]+blob[2]//2, blob[1]+blob[3]//2)
     return None
 
@@ -149,18 +164,21 @@ def send_servo_command(data):
     packet = b'\xFF' + data_bytes + b'\xFE'
     uart.write(packet)
 
-def generate_path(points, segments=20):
-    """生成平滑路径点"""
-    path = []
-    for i in range(len(points)):
-        start = points[i]
-        end = points[(i+1)%len(points)]
-        for j in range(segments):
-            ratio = j / segments
-            px = start[0] + (end[0]-start[0]) * ratio
-            py = start[1] + (end[1]-start[1]) * ratio
-            path.append((px, py))
-    return path
+def track_path_step(planner, t, dt):
+    """沿预计算路径推进移动目标并发送舵机指令，返回 (新的路径时间, 是否已走完)"""
+    target_x, target_y = planner.target_at(t)
+    overlay.draw_circle(int(target_x), int(target_y), 4, image.COLOR_RED)
+    angle_x, angle_y = calculate_servo_angles(
+        target_x, target_y, last_spot[0], last_spot[1])
+
+    # 发送舵机指令
+    data = (clamp_angle(angle_x) + 127, clamp_angle(angle_y) + 127)
+    send_servo_command(data)
+
+    # 激光点跟上目标时才按设定速度推进
+    if hypot(target_x - last_spot[0], target_y - last_spot[1]) < TRACK_TOLERANCE:
+        t += dt
+    return t, planner.finished(t)
 
 def clamp_angle(angle):
     # 限制角度范围
@@ -197,17 +215,29 @@ def sort_points_clockwise(points):
 
     return sorted_points
 
-def generate_closed_path(img):
-    """生成闭合路径（顺时针）"""
-    blobs = detect_black_blocks(img)
-    if len(blobs) < 3:  # 至少需要3个点形成闭合路径
+# 黑色块跟踪：ID 稳定后只在轨迹增删时重新排序
+block_tracker = MultiTargetTracker()
+track_order = []   # 顺时针排列的轨迹ID
+
+def block_detections(img):
+    """黑色块中心与尺寸，作为跟踪器的输入"""
+    return [(blob[0]+blob[2]//2, blob[1]+blob[3]//2, blob[2], blob[3]) for blob in detect_black_blocks(img)]
+
+def generate_closed_path(tracks):
+    """由跟踪节点输出的轨迹生成闭合路径（顺时针）"""
+    global track_order
+    if tracks is None:  # 跟踪节点本帧未运行
         return []
 
-    # 获取中心点
-    points = [(blob[0]+blob[2]//2, blob[1]+blob[3]//2) for blob in blobs]
+    # 轨迹集合变化时才按顺时针重新排序，单个色块移动不改变顺序
+    if block_tracker.ids_changed or len(track_order) != len(tracks):
+        track_order = [p[2] for p in sort_points_clockwise([(t.x, t.y, t.id) for t in tracks])]
 
-    # 按顺时针排序
-    sorted_points = sort_points_clockwise(points)
+    if len(track_order) < 3:  # 至少需要3个点形成闭合路径
+        return []
+
+    # 使用滤波后的轨迹中心
+    sorted_points = [block_tracker.get(i).center() for i in track_order]
 
     # 添加第一个点使路径闭合
     sorted_points.append(sorted_points[0])
@@ -218,125 +248,126 @@ def generate_closed_path(img):
 pid_x = PIDController(kp=0.3, ki=0, kd=0, limit=2)
 pid_y = PIDController(kp=0.3, ki=0, kd=0, limit=2)
 
-# 主循环
-while True:
-    img = cam.read()
-    if not img:
-        continue
+# === 模式状态机：准备工作在进入模式时完成一次，每帧只执行跟踪 ===
+def enter_border():
+    global path, border_t
+    path = None
+    if border_points:
+        path = PathPlanner(border_points, closed=True, speed=PATH_SPEED,
+                           corner_radius=CORNER_RADIUS)
+    border_t = 0.0
+
+def step_border(img, dt, tracks):
+    global border_t
+    if path and not path.finished(border_t):
+        # 绘制路径
+        path.draw(overlay, image.COLOR_BLUE)
+        border_t, done = track_path_step(path, border_t, dt)
+        if done:
+            print("边线完成")
+
+def enter_reset():
+    global path_origin, reset_t, direction
+    direction = True  # True：正方向
+    path_origin = PathPlanner([last_spot, origin_point], closed=False, speed=PATH_SPEED)
+    reset_t = 0.0
+
+def step_reset(img, dt, tracks):
+    global reset_t
+    # 绘制复位路径
+    path_origin.draw(overlay, image.COLOR_YELLOW)
+    reset_t, done = track_path_step(path_origin, reset_t, dt)
+    if done:
+        print("复位完成")
+        # 回到 BORDER 但不重新进入：边线路径与进度保持复位前的状态
+        modes.transition("BORDER", reason="done", enter=False)
+
+def enter_closed_track():
+    global track_order, track_path
+    block_tracker.clear()
+    track_order = []
+    track_path = []
+    pipeline.enable("track")   # 黑色块检测与跟踪只在本模式下运行
+
+def exit_closed_track():
+    pipeline.enable("track", False)
+
+def step_closed_track(img, dt, tracks):
+    global track_path
+    # 跟踪节点每帧更新轨迹；色块增删时才重新排序，新确认的色块会加入路径
+    track_path = generate_closed_path(tracks)
+    if track_path:
+        # 绘制闭合路径（只显示，不驱动舵机）
+        overlay.draw_polyline(track_path, image.COLOR_GREEN)
+
+modes = StateMachine()
+modes.add("BORDER", enter=enter_border, step=step_border)
+modes.add("RESET", enter=enter_reset, step=step_reset)
+modes.add("CLOSED_TRACK", enter=enter_closed_track, step=step_closed_track, exit=exit_closed_track)
+
+# 串口指令 -> 模式
+MODE_COMMANDS = {
+    "START_BORDER": "BORDER",
+    "START_RESET": "RESET",
+    "START_CLOSED_TRACK": "CLOSED_TRACK",
+}
+
+def save_point(mode):
+    """按指令保存当前激光点为原点或边线点"""
+    global calibration_mode
+    calibration_mode = mode
+    save_current_point()
+    calibration_mode = "IDLE"
+
+# 串口指令 -> 只执行一次的动作
+ACTION_COMMANDS = {
+    "SAVE_ORIGIN": lambda: save_point("ORIGIN"),
+    "SAVE_BORDER": lambda: save_point("BORDER"),
+}
+
+def read_command():
+    cmd = read_uart_packet()
+    print("CMD:", cmd)
+    return cmd
+
+def update_spot(img):
+    """检测红色激光点，未检测到时保持上一次的位置"""
+    global last_spot
+    spot = find_red_spot(img)
+    if spot:
+        last_spot = spot
+    return spot
 
+def draw_markers(overlay):
     # 绘制边界点
     if len(border_points) >= 1:
         for (x, y) in border_points:
-            img.draw_cross(x, y, image.COLOR_RED)
+            overlay.draw_cross(x, y, image.COLOR_RED)
 
     # 绘制原点
     if origin_point:
-        img.draw_cross(origin_point[0], origin_point[1], image.COLOR_GREEN)
+        overlay.draw_cross(origin_point[0], origin_point[1], image.COLOR_GREEN)
+
+# === 流水线：通用节点见 Source/nodes.py ===
+# 所有节点共用同一个叠加层缓冲，串行执行
+pipeline = Pipeline(workers=1)
+pipeline.add("capture", CaptureNode(cam), outputs=("img",))
+pipeline.add("clock", ClockNode(), outputs=("dt",))
+# 检测红色激光点
+pipeline.add("spot", update_spot, inputs=("img",), outputs=("spot",))
+# === 指令处理 ===
+pipeline.add("serial", SerialNode(read_command, uart.any), outputs=("cmd",))
+# 黑色块跟踪，只在 CLOSED_TRACK 模式启用
+pipeline.add("track", TrackNode(block_detections, block_tracker), inputs=("img",), outputs=("tracks",))
+pipeline.enable("track", False)
+# === 模式执行 ===
+pipeline.add("modes", ModeNode(modes, MODE_COMMANDS, ACTION_COMMANDS), inputs=("cmd", "img", "dt", "tracks"),
+             outputs=("mode",), after=("spot",))
+# 统一绘制叠加层并显示图像（无头模式下均跳过）
+pipeline.add("overlay", OverlayNode(overlay, draw_markers), inputs=("img",), outputs=("canvas",), after=("modes",))
+pipeline.add("display", DisplayNode(disp, overlay), inputs=("canvas",), sink=True)
 
-    # 检测红色激光点
-    spot = find_red_spot(img)
-    if spot:
-        last_spot = spot
-
-    # === 指令处理 ===
-    if uart.any():
-        cmd = read_uart_packet()
-        print("CMD:", cmd)
-
-    if cmd == "SAVE_ORIGIN":
-        calibration_mode = "ORIGIN"
-        save_current_point()
-        calibration_mode = "IDLE"
-        cmd = "None"
-
-    elif cmd == "SAVE_BORDER":
-        calibration_mode = "BORDER"
-        save_current_point()
-        calibration_mode = "IDLE"
-        cmd = "None"
-
-    elif cmd == "START_BORDER":
-        copy_current_target = []
-        MODE = "BORDER"
-        path = generate_path(border_points)
-        cmd = "None"
-        current_target = 0
-
-    elif cmd == "START_RESET":
-        direction = True  # True：正方向
-        copy_reset_target = []
-        current_origin = [last_spot, origin_point]
-        path_origin = generate_path(current_origin)
-        MODE = "RESET"
-        cmd = "None"
-        current_target_reset = 0
-
-    elif cmd == "START_CLOSED_TRACK":
-        MODE = "CLOSED_TRACK"
-        cmd = "None"
-
-    # === 模式执行 ===
-    if MODE == "BORDER":
-        if copy_current_target:
-            for (x, y) in copy_current_target:
-                img.draw_circle(int(x), int(y), 4, image.COLOR_RED)
-
-        if path and current_target < len(path):
-            # 绘制路径点
-            for (x, y) in path:
-                img.draw_cross(int(x), int(y), image.COLOR_BLUE)
-
-            # 获取当前目标点
-            target_x, target_y = path[current_target]
-            angle_x, angle_y = calculate_servo_angles(
-                target_x, target_y, last_spot[0], last_spot[1])
-
-            # 发送舵机指令
-            data = (clamp_angle(angle_x) + 127, clamp_angle(angle_y) + 127)
-            send_servo_command(data)
-
-            # 检查是否到达目标点
-            if hypot(target_x - last_spot[0], target_y - last_spot[1]) < 6:
-                copy_current_target.append(path[current_target])
-                current_target += 1
-                print(f"当前目标点: {current_target}/{len(path)}")
-
-    elif MODE == "RESET":
-        if copy_reset_target:
-            for (x, y) in copy_reset_target:
-                img.draw_circle(int(x), int(y), 4, image.COLOR_YELLOW)
-
-        if path_origin and current_target_reset < len(path_origin):
-            # 绘制复位路径
-            for (x, y) in path_origin:
-                img.draw_cross(int(x), int(y), image.COLOR_YELLOW)
-
-            # 获取当前目标点
-            target_x, target_y = path_origin[current_target_reset]
-            angle_x, angle_y = calculate_servo_angles(
-                target_x, target_y, last_spot[0], last_spot[1])
-
-            # 发送舵机指令
-            data = (clamp_angle(angle_x) + 127, clamp_angle(angle_y) + 127)
-            send_servo_command(data)
-
-            # 检查是否到达目标点
-            if hypot(target_x - last_spot[0], target_y - last_spot[1]) < 6:
-                copy_reset_target.append(path_origin[current_target_reset])
-                current_target_reset += 1
-                if current_target_reset >= len(path_origin):
-                    MODE = "BORDER"
-                    print("复位完成")
-
-    elif MODE == "CLOSED_TRACK":
-        track_path = generate_closed_path(img)
-        if track_path:
-            # 绘制闭合路径
-            for i in range(len(track_path)-1):
-                x1, y1 = track_path[i]
-                x2, y2 = track_path[i+1]
-                img.draw_line(x1, y1, x2, y2, image.COLOR_GREEN)
-
-    # 显示图像
-    disp.show(img)
+# 主循环
+while True:
+    pipeline.run_once()
     clock.tick()
@@ -1,5 +1,6 @@
 from maix import image, display, camera, app
 import math
+from roi_cascade import clip_roi
 
 class BlackRectangleDetector:
     def __init__(self, cam, black_threshold):
@@ -16,26 +17,13 @@ class BlackRectangleDetector:
 
 
 
-    def detect_rect_in_blob(self, img, blob):
-        """在色块区域内检测矩形"""
-        rect_roi = None
-        # 获取色块ROI (x, y, width, height)
-        if blob is not None:
-            x, y, w, h = blob.rect()
-            # 扩展ROI边界，确保矩形完整
-            rect_roi = (x-10, y-10, w+20, h+20)
-            # print(rect_roi)
-            # roi = (x, y, x+w, y+h)
-        # 在ROI内检测矩形（移除max_rects参数）
-        rects = img.find_rects(
-            threshold=5000,        # 矩形检测阈值
-            # roi=rect_roi              # 限制检测区域
-        )
-
-        if rect_roi:
-            # 限制检测区域
-            rects = [rect for rect in rects if rect_roi[0] <= rect.x() <= rect_roi[0] + rect_roi[2] and
-                     rect_roi[1] <= rect.y() <= rect_roi[1] + rect_roi[3]]
+    def find_rect(self, img, roi=None):
+        """在指定区域内检测最大矩形（roi 为 None 时全图）"""
+        if roi is None:
+            rects = img.find_rects(threshold=5000)   # 矩形检测阈值
+        else:
+            # ROI 已裁剪到图像范围内，find_rects 只扫描该区域
+            rects = img.find_rects(threshold=5000, roi=roi)
         if not rects:
             return None
 
@@ -43,6 +31,15 @@ class BlackRectangleDetector:
         largest_rect = max(rects, key=lambda r: r.w() * r.h())
         return largest_rect
 
+    def detect_rect_in_blob(self, img, blob):
+        """在色块区域内检测矩形"""
+        rect_roi = None
+        # 获取色块ROI (x, y, width, height)
+        if blob is not None:
+            # 扩展ROI边界，确保矩形完整
+            rect_roi = clip_roi(blob.rect(), img.width(), img.height(), 10)
+        return self.find_rect(img, rect_roi)
+
 
     def calculate_center(self, rect):
         """根据矩形角点计算中心点"""
@@ -55,10 +52,11 @@ class BlackRectangleDetector:
         cy = sum(point[1] for point in corners) // 4
         return corners, (cx, cy)
 
-    def process_frame(self, max_blob):
-        """处理单帧图像，返回矩形四个顶点和中心点"""
+    def process_frame(self, max_blob, img=None):
+        """处理单帧图像，返回矩形四个顶点和中心点（img 为 None 时自行读取摄像头）"""
         # 读取图像
-        img = self.cam.read()
+        if img is None:
+            img = self.cam.read()
         if img is None:
             return None
 
@@ -68,7 +66,15 @@ class BlackRectangleDetector:
             return None
 
         # 步骤2: 在色块内检测矩形
-        self.target_rect = self.detect_rect_in_blob(img, self.max_blob)
+        return self._check_rect(self.detect_rect_in_blob(img, self.max_blob))
+
+    def process_roi(self, img, roi):
+        """ROI级联接口：直接在上一级给出的区域内检测矩形"""
+        return self._check_rect(self.find_rect(img, roi))
+
+    def _check_rect(self, rect):
+        """计算顶点与中心点并检查角度，通过返回 (顶点, 中心点)，否则返回 None"""
+        self.target_rect = rect
         if not self.target_rect:
             return None
 
@@ -79,11 +85,10 @@ class BlackRectangleDetector:
 
         # 检查角度是否接近90度（过滤旋转或不规则矩形）
         angles = self.calculate_angles(self.corners)  # 需实现角度计算函数
-        if angles is None:
-            return (None, None)
-        if all(abs(angle - 90) < 35 for angle in angles):
-            # print(angles)
-            return (self.corners, self.rect_center)
+        if angles is None or not all(abs(angle - 90) < 35 for angle in angles):
+            return None
+        # print(angles)
+        return (self.corners, self.rect_center)
 
     def calculate_angles(self, corners):
         """
@@ -142,7 +147,7 @@ if __name__ == "__main__":
     cam = camera.Camera(320, 240, image.Format.FMT_RGB888)
     detector = BlackRectangleDetector(cam, [(0, 0, -128, 0, 0, 0)])
     while not app.need_exit():
-        result = detector.process_frame()
+        result = detector.process_roi(cam.read(), None)
         if result:
             corners, center = result
             print(f"顶点: {corners}, 中心点: {center}")
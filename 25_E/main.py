@@ -6,6 +6,10 @@ from menu import MenuInterface
 from black_rect_detector import BlackRectangleDetector
 from servo import ServoController
 from pid import PIDIncrementalController
+from roi_cascade import ROICascade
+from pipeline import Pipeline
+from nodes import CaptureNode, CascadeNode, OverlayNode, MenuNode, DisplayNode
+from overlay import Overlay
 
 SCREEN_WIDTH, SCREEN_HEIGHT = 320, 240
 CAMERA_RESOLUTION = (SCREEN_WIDTH, SCREEN_HEIGHT)
@@ -41,6 +45,16 @@ white_threshold = [[42, 76, -4, 19, -8, 19]]
 white_detector = BlobDetector(white_threshold, 10000)
 white_roi = None
 
+# ROI级联：白板 -> 白板内缩20像素找黑色色块 -> 色块外扩10像素找矩形
+def find_black(img, roi):
+    result = black_detector.detect_max_blob(img, roi)
+    return result if result[2] else None
+
+cascade = ROICascade()
+cascade.add("white", lambda img, roi: white_detector.detect_max_blob(img, roi)[2])
+cascade.add("black", find_black, parent="white", margin=-20, region=lambda r: r[2].rect())
+cascade.add("rect", rect_detector.process_roi, parent="black", margin=10)
+
 start_flag = 0
 servo_flag = False
 servo_180 = ServoController(180)
@@ -53,52 +67,35 @@ ctrl_angle_180 = 90
 # pid_y.limit(90)
 # pid_y.set_point(CAMERA_RESOLUTION[1] // 2)
 
-while not app.need_exit():
-    img = cam.read()
-        
-    _, _, white_blob = white_detector.detect_max_blob(img)
-    if white_blob is not None:
-        white_x, white_y, white_w, white_h = white_blob.rect()
-        white_roi = (white_x+20, white_y+20, white_w-40, white_h-40)
-        # img.draw_rect(white_x+20, white_y+20, white_w-40, white_h-40, image.COLOR_BLACK, 2)
-    
-    black_result = black_detector.detect_max_blob(img, white_roi)
-    if black_result is not None:
-        if black_result[0]:
-            black_x, black_y = black_result[0]
-            # img.draw_cross(black_x, black_y, image.COLOR_BLACK, 5, 2)
-        max_blob = black_result[2]
-        if max_blob:
-            max_blob_flag = True
-            x, y, w, h = max_blob.rect()
-            # 绘制矩形（左上角x, 左上角y, 右下角x, 右下角y, 颜色, 线宽）
-            # img.draw_rect(x, y, w, h, image.COLOR_RED, 2)
-        else:
-            max_blob_flag = False
-        
+# === 流水线 ===
+# 通用节点见 nodes.py，这里只提供本版本的绘制内容与菜单响应
+
+def draw_marks(overlay, black_result, rect_result):
+    global black_x, black_y, max_blob, rect_x, rect_y, last_rect_x, last_rect_y
+    # 本帧没有检测到色块时不沿用上一帧的结果
+    max_blob = black_result[2] if black_result is not None else None
+    if black_result is not None and black_result[0]:
+        black_x, black_y = black_result[0]
+        # overlay.draw_cross(black_x, black_y, image.COLOR_BLACK, 5, 2)
+    # if max_blob:
+    #     x, y, w, h = max_blob.rect()
+    #     # 绘制矩形（左上角x, 左上角y, 右下角x, 右下角y, 颜色, 线宽）
+    #     overlay.draw_rect(x, y, w, h, image.COLOR_RED, 2)
+    # white_roi = cascade.roi("black")
+    # if white_roi:
+    #     overlay.draw_rect(*white_roi, image.COLOR_BLACK, 2)
 
     # 获取矩形中心点
-    rect_result = rect_detector.process_frame(max_blob)
-
-    # print(rect_result)
     if rect_result is not None:
         corners, center = rect_result
-        if corners and len(corners) == 4:
-    # 按顺序连接4个点，最后一个点连接回第一个点
-            for i in range(4):
-                x1, y1 = corners[i]
-                x2, y2 = corners[(i+1) % 4]  # 取模运算实现循环连接
-                img.draw_line(x1, y1, x2, y2, color=image.COLOR_BLUE, thickness=1)
-        if center is not None:
-            rect_x, rect_y = center
-            last_rect_x, last_rect_y = rect_x, rect_y
-            # 绘制十字交叉
-            img.draw_cross(rect_x, rect_y, image.COLOR_GREEN, 5, 1)
+        # 按顺序连接4个点，最后一个点连接回第一个点
+        overlay.draw_polyline(corners, image.COLOR_BLUE, 1, closed=True)
+        rect_x, rect_y = center
+        last_rect_x, last_rect_y = rect_x, rect_y
+        # 绘制十字交叉
+        overlay.draw_cross(rect_x, rect_y, image.COLOR_GREEN, 5, 1)
     else:
-        img.draw_cross(black_x, black_y, image.COLOR_GREEN, 5, 1)
-
-        
-        
+        overlay.draw_cross(black_x, black_y, image.COLOR_GREEN, 5, 1)
 
     # if servo_flag:
     #     pid_x.update(blue_x)
@@ -110,9 +107,8 @@ while not app.need_exit():
     #     servo_270.set_angle(ctrl_angle_270)
     #     print(blue_x, blue_y, ctrl_angle_270, ctrl_angle_180)
 
-    menu.render(img)
-    menu.update()
-    white_flag, black_flag, start_flag = menu.get_flags()
+def on_menu(white_flag, black_flag, start_flag):
+    global white_threshold, black_threshold, servo_flag
     if white_flag:
         config = ColorThresholdConfig(cam, disp, ts, white_threshold) # 运行阈值调整
         white_threshold = config.run_threshold_adjust()
@@ -123,5 +119,19 @@ while not app.need_exit():
         black_detector.set_threshold(black_threshold)
     if start_flag:
         servo_flag = True
-    
-    disp.show(img)
\ No newline at end of file
+
+overlay = Overlay()
+
+# 级联各级共享同一帧缓存，节点串行执行
+pipeline = Pipeline(workers=1)
+pipeline.add("capture", CaptureNode(cam), outputs=("img",))
+# 矩形只在黑色色块区域内搜索，黑色色块只在白板区域内搜索（同一帧内不重复检测）
+pipeline.add("black", CascadeNode(cascade, "black"), inputs=("img",), outputs=("black_result",))
+pipeline.add("rect", CascadeNode(cascade, "rect"), inputs=("img",), outputs=("rect_result",))
+pipeline.add("overlay", OverlayNode(overlay, draw_marks), inputs=("img", "black_result", "rect_result"),
+             outputs=("canvas",))
+pipeline.add("menu", MenuNode(menu, on_menu), inputs=("canvas",), outputs=("menu_done",))
+pipeline.add("display", DisplayNode(disp), inputs=("canvas",), sink=True, after=("menu",))
+
+while not app.need_exit():
+    pipeline.run_once()
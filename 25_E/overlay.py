@@ -0,0 +1,144 @@
+from maix import image, time
+from array import array
+
+# 绘制指令类型
+OP_LINE = 0
+OP_RECT = 1
+OP_CROSS = 2
+OP_CIRCLE = 3
+OP_STRING = 4
+
+
+class Overlay:
+    FIELDS = 7      # 每条指令: (类型, a, b, c, d, 颜色索引, 线宽)
+    ALPHA = 0.1     # 耗时滑动平均系数
+
+    def __init__(self, headless=False):
+        """
+        叠加层绘制指令缓冲：检测结果先记录为紧凑数组，flush() 时统一绘制
+        记录接口与 maix 图像的 draw_* 同名同参数，可直接替代 img 传给绘制函数
+        无头模式下 flush() 丢弃指令、show() 跳过显示，并累计节省的时间
+        :param headless: 是否启用无头模式
+        """
+        self.cmds = array('h')
+        self.palette = []       # 本帧用到的颜色
+        self._color_idx = {}    # {id(颜色): 索引}
+        self.strings = []       # 本帧的文字内容
+        self.headless = headless
+        self.cmd_ms = 0.0       # 单条指令平均绘制耗时
+        self.show_ms = 0.0      # 单次显示平均耗时
+        self.saved_ms = 0.0     # 无头模式累计节省的时间（按有画面时的平均耗时估算）
+        self.dropped = 0        # 丢弃的指令数
+        self.skipped_shows = 0  # 跳过的显示次数
+
+    def set_headless(self, headless):
+        self.headless = bool(headless)
+
+    def _color(self, color):
+        idx = self._color_idx.get(id(color))
+        if idx is None:
+            idx = len(self.palette)
+            self.palette.append(color)   # 保持引用，保证 id 在本帧内有效
+            self._color_idx[id(color)] = idx
+        return idx
+
+    def _add(self, op, a, b, c, d, color, thickness):
+        self.cmds.extend((op, int(a), int(b), int(c), int(d), self._color(color), int(thickness)))
+
+    def draw_line(self, x1, y1, x2, y2, color, thickness=1):
+        self._add(OP_LINE, x1, y1, x2, y2, color, thickness)
+
+    def draw_rect(self, x, y, w, h, color, thickness=1):
+        self._add(OP_RECT, x, y, w, h, color, thickness)
+
+    def draw_cross(self, x, y, color, size=5, thickness=1):
+        self._add(OP_CROSS, x, y, size, 0, color, thickness)
+
+    def draw_circle(self, x, y, radius, color, thickness=1):
+        self._add(OP_CIRCLE, x, y, radius, 0, color, thickness)
+
+    def draw_string(self, x, y, text, color):
+        self._add(OP_STRING, x, y, len(self.strings), 0, color, 1)
+        self.strings.append(text)
+
+    def draw_polyline(self, points, color, thickness=1, closed=False):
+        """绘制折线（closed 为 True 时首尾相连）"""
+        n = len(points)
+        for i in range(n if closed else n - 1):
+            x1, y1 = points[i]
+            x2, y2 = points[(i + 1) % n]
+            self._add(OP_LINE, x1, y1, x2, y2, color, thickness)
+
+    def clear(self):
+        del self.cmds[:]
+        self.palette = []
+        self._color_idx = {}
+        self.strings = []
+
+    def flush(self, img):
+        """
+        绘制并清空本帧指令（无头模式下直接丢弃）
+        :return: 绘制的指令数
+        """
+        n = len(self.cmds) // self.FIELDS
+        if self.headless:
+            self.dropped += n
+            self.saved_ms += n * self.cmd_ms
+            self.clear()
+            return 0
+        start = time.ticks_us()
+        cmds, palette, f = self.cmds, self.palette, self.FIELDS
+        for i in range(0, len(cmds), f):
+            op, a, b, c, d, ci, t = cmds[i:i + f]
+            color = palette[ci]
+            if op == OP_LINE:
+                img.draw_line(a, b, c, d, color, t)
+            elif op == OP_RECT:
+                img.draw_rect(a, b, c, d, color, t)
+            elif op == OP_CROSS:
+                img.draw_cross(a, b, color, c, t)
+            elif op == OP_CIRCLE:
+                img.draw_circle(a, b, c, color, t)
+            elif op == OP_STRING:
+                img.draw_string(a, b, self.strings[c], color)
+        if n:
+            per_cmd = (time.ticks_us() - start) / 1000 / n
+            self.cmd_ms += self.ALPHA * (per_cmd - self.cmd_ms) if self.cmd_ms else per_cmd
+        self.clear()
+        return n
+
+    def show(self, disp, img):
+        """显示图像（无头模式下跳过）"""
+        if self.headless:
+            self.skipped_shows += 1
+            self.saved_ms += self.show_ms
+            return
+        start = time.ticks_us()
+        disp.show(img)
+        elapsed = (time.ticks_us() - start) / 1000
+        self.show_ms += self.ALPHA * (elapsed - self.show_ms) if self.show_ms else elapsed
+
+    def stats(self):
+        """返回 (丢弃指令数, 跳过显示次数, 累计节省毫秒)"""
+        return self.dropped, self.skipped_shows, self.saved_ms
+
+
+if __name__ == "__main__":
+    from maix import camera, display, app
+
+    cam = camera.Camera(320, 240)
+    disp = display.Display()
+    overlay = Overlay()
+    frames = 0
+    while not app.need_exit():
+        img = cam.read()
+        for blob in img.find_blobs([[0, 10, -4, 7, -10, 20]], pixels_threshold=50):
+            overlay.draw_rect(*blob.rect(), image.COLOR_RED, 2)
+            overlay.draw_cross(blob.cx(), blob.cy(), image.COLOR_GREEN, 5, 2)
+        overlay.flush(img)
+        overlay.show(disp, img)
+        frames += 1
+        if frames == 300:
+            overlay.set_headless(True)   # 之后只检测不显示
+        if frames % 300 == 0:
+            print("dropped: %d, skipped: %d, saved: %.1f ms" % overlay.stats())
@@ -0,0 +1,176 @@
+from maix import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Node:
+    def __init__(self, name, func, inputs=(), outputs=(), sink=False, after=()):
+        """
+        流水线节点
+        :param name: 节点名称
+        :param func: 处理函数，按 inputs 顺序接收参数；单输出直接返回值，多输出返回元组
+        :param inputs: 输入数据名列表
+        :param outputs: 输出数据名列表
+        :param sink: 终端节点（显示、串口等），即使输出无人使用也始终调度
+        :param after: 必须先于本节点执行的节点名称（只约束顺序、不传递数据，如先平移阈值再检测）
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.sink = sink
+        self.after = tuple(after)
+        self.enabled = True
+        self.time_ms = 0.0   # 平滑后的单次耗时
+        self.calls = 0
+
+
+class Pipeline:
+    ALPHA = 0.1   # 节点耗时滑动平均系数
+
+    def __init__(self, workers=2):
+        """
+        数据流流水线：节点声明输入/输出，运行时自动确定执行顺序
+        - 只调度终端节点直接或间接依赖的节点
+        - 同一层内互不依赖的节点并行执行
+        - 记录每个节点的耗时
+        :param workers: 并行线程数，1 为全部串行
+        """
+        self.nodes = {}        # {名称: 节点}，保持注册顺序
+        self.producers = {}    # {数据名: 节点}
+        self.stages = None     # 调度计划（按依赖分层），节点变化后重建
+        self.pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self.values = {}       # 上一帧所有数据
+        self.frames = 0
+
+    def add(self, name, func, inputs=(), outputs=(), sink=False, after=()):
+        """注册节点，返回节点对象"""
+        if name in self.nodes:
+            raise ValueError(f"节点重名: {name}")
+        for out in outputs:
+            if out in self.producers:
+                raise ValueError(f"数据 {out} 已由节点 {self.producers[out].name} 输出")
+        node = Node(name, func, inputs, outputs, sink, after)
+        self.nodes[name] = node
+        for out in node.outputs:
+            self.producers[out] = node
+        self.stages = None
+        return node
+
+    def enable(self, name, enabled=True):
+        """启用/禁用节点，禁用节点的输出为 None"""
+        self.nodes[name].enabled = enabled
+        self.stages = None
+
+    def _deps(self, node):
+        """节点依赖的已启用上游节点"""
+        deps = set()
+        for inp in node.inputs:
+            producer = self.producers.get(inp)
+            if producer is None:
+                raise ValueError(f"节点 {node.name} 的输入 {inp} 没有节点输出")
+            if producer.enabled:
+                deps.add(producer.name)
+        for name in node.after:
+            if name not in self.nodes:
+                raise ValueError(f"节点 {node.name} 依赖的节点 {name} 不存在")
+            if self.nodes[name].enabled:
+                deps.add(name)
+        return deps
+
+    def _plan(self):
+        """从终端节点反向收集需要运行的节点，并按依赖分层"""
+        needed = set()
+        stack = [n for n in self.nodes.values() if n.sink and n.enabled]
+        while stack:
+            node = stack.pop()
+            if node.name in needed:
+                continue
+            needed.add(node.name)
+            stack.extend(self.nodes[d] for d in self._deps(node))
+
+        stages = []
+        done = set()
+        remaining = [n for n in self.nodes.values() if n.name in needed]
+        while remaining:
+            ready = [n for n in remaining if self._deps(n) <= done]
+            if not ready:
+                raise ValueError("流水线存在循环依赖: " + ", ".join(n.name for n in remaining))
+            stages.append(ready)
+            done.update(n.name for n in ready)
+            remaining = [n for n in remaining if n.name not in done]
+        self.stages = stages
+
+    def _run(self, node, values):
+        args = [values.get(inp) for inp in node.inputs]
+        start = time.ticks_us()
+        result = node.func(*args)
+        elapsed = (time.ticks_us() - start) / 1000
+        node.time_ms = elapsed if node.calls == 0 else node.time_ms + self.ALPHA * (elapsed - node.time_ms)
+        node.calls += 1
+        if len(node.outputs) == 1:
+            values[node.outputs[0]] = result
+        elif node.outputs:
+            for out, value in zip(node.outputs, result):
+                values[out] = value
+
+    def run_once(self):
+        """
+        执行一帧
+        :return: 本帧所有数据 {数据名: 值}
+        """
+        if self.stages is None:
+            self._plan()
+        values = {}
+        for stage in self.stages:
+            if self.pool is None or len(stage) == 1:
+                for node in stage:
+                    self._run(node, values)
+            else:
+                futures = [self.pool.submit(self._run, node, values) for node in stage]
+                for future in futures:
+                    future.result()   # 传递节点内的异常
+        self.values = values
+        self.frames += 1
+        return values
+
+    def report(self):
+        """返回各节点平均耗时报告（按调度顺序）"""
+        if self.stages is None:
+            self._plan()
+        lines = []
+        for i, stage in enumerate(self.stages):
+            for node in stage:
+                lines.append(f"[{i}] {node.name:<12} {node.time_ms:6.2f} ms")
+        return "\n".join(lines)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+if __name__ == "__main__":
+    from maix import camera, display, image, app
+
+    cam = camera.Camera(320, 240)
+    disp = display.Display()
+    pipeline = Pipeline()
+    pipeline.add("capture", cam.read, outputs=("img",))
+    pipeline.add("blobs", lambda img: img.find_blobs([[0, 10, -4, 7, -10, 20]], pixels_threshold=50),
+                 inputs=("img",), outputs=("blobs",))
+    pipeline.add("rects", lambda img: img.find_rects(threshold=5000), inputs=("img",), outputs=("rects",))
+    pipeline.add("unused", lambda img: img.find_lines(), inputs=("img",), outputs=("lines",))  # 无人使用，不会调度
+
+    def overlay(img, blobs, rects):
+        for b in blobs:
+            img.draw_rect(*b.rect(), image.COLOR_RED, 2)
+        for r in rects:
+            img.draw_rect(*r.rect(), image.COLOR_BLUE, 2)
+        return img
+
+    pipeline.add("overlay", overlay, inputs=("img", "blobs", "rects"), outputs=("canvas",))
+    pipeline.add("display", disp.show, inputs=("canvas",), sink=True)
+
+    while not app.need_exit():
+        pipeline.run_once()
+        if pipeline.frames % 100 == 0:
+            print(pipeline.report())
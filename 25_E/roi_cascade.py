@@ -0,0 +1,69 @@
+def clip_roi(roi, width, height, margin=0):
+    """
+    外扩（margin 为负时内缩）并裁剪到图像范围内
+    :return: (x, y, w, h)，区域为空时返回 None
+    """
+    x, y, w, h = roi
+    x0 = max(0, x - margin)
+    y0 = max(0, y - margin)
+    x1 = min(width, x + w + margin)
+    y1 = min(height, y + h + margin)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class ROICascade:
+    def __init__(self):
+        """
+        嵌套ROI级联：每级检测声明父级，只在父级结果区域（加边距）内搜索
+        每级结果按帧缓存，同一帧内多次查询不重复检测；父级无结果时子级直接跳过
+        """
+        self.stages = {}     # {名称: (检测函数, 父级名称, 边距, 区域函数)}
+        self._frame = None   # 当前帧（保持引用，保证缓存有效）
+        self.results = {}    # 本帧各级结果
+        self.regions = {}    # 本帧各级搜索区域（None 为全图）
+
+    def add(self, name, detect, parent=None, margin=0, region=None):
+        """
+        登记一级检测
+        :param detect: detect(img, roi) -> 结果，无结果返回 None；roi 为 None 表示全图
+        :param parent: 父级名称，None 为顶层（全图搜索）
+        :param margin: 搜索区域相对父级结果区域的外扩像素，负数为内缩
+        :param region: region(result) -> 本级结果所在区域 (x, y, w, h)，默认 result.rect()
+        """
+        if parent is not None and parent not in self.stages:
+            raise ValueError(f"父级 {parent} 未登记")
+        self.stages[name] = (detect, parent, margin, region or (lambda r: r.rect()))
+
+    def run(self, img, name):
+        """
+        获取某一级在本帧的结果（按需先运行父级）
+        """
+        if img is not self._frame:
+            self._frame = img
+            self.results = {}
+            self.regions = {}
+        if name in self.results:
+            return self.results[name]
+
+        detect, parent, margin, _ = self.stages[name]
+        roi = None
+        if parent is not None:
+            parent_result = self.run(img, parent)
+            parent_region = None if parent_result is None else self.stages[parent][3](parent_result)
+            if parent_region is not None:
+                roi = clip_roi(parent_region, img.width(), img.height(), margin)
+            if roi is None:
+                self.regions[name] = None
+                self.results[name] = None
+                return None
+
+        self.regions[name] = roi
+        result = detect(img, roi)
+        self.results[name] = result
+        return result
+
+    def roi(self, name):
+        """本帧某一级实际使用的搜索区域"""
+        return self.regions.get(name)
@@ -0,0 +1 @@
+# 共用模块包：仓库根目录的脚本以 Source.xxx 导入，Source 目录内的脚本仍按模块名直接导入
@@ -0,0 +1,86 @@
+from maix import camera
+from cv_bridge import CVBridge
+
+
+def lock_camera(cam):
+    """关闭自动曝光与自动白平衡（同 2023_2.py 中 sensor.set_auto_gain(False) 的做法）"""
+    cam.exp_mode(camera.AeMode.Manual)
+    cam.awb_mode(camera.AwbMode.Manual)
+
+
+class AdaptiveThreshold:
+    GRID_STEP = 16    # 亮度统计的采样间隔（像素）
+    ALPHA = 0.05      # 亮度指数滑动平均系数
+    MIN_SHIFT = 1     # L 偏移变化达到该值才更新阈值
+
+    def __init__(self, grid_step=GRID_STEP, alpha=ALPHA):
+        """
+        跟踪全局 L 通道亮度并平移已登记阈值的 L 上下界，补偿光照变化
+        :param grid_step: 亮度统计的采样间隔
+        :param alpha: 亮度滑动平均系数
+        """
+        self.grid_step = grid_step
+        self.alpha = alpha
+        self.l_mean = None      # 当前平滑后的 L 均值
+        self.entries = {}       # {名称: [基准阈值, 基准L均值, 回调, 已应用的L偏移]}
+        self.bridge = CVBridge.get_instance()
+
+    def register(self, name, threshold, callback):
+        """
+        登记一个 LAB 阈值，以当前亮度为基准
+        :param threshold: [(Lmin, Lmax, Amin, Amax, Bmin, Bmax)]
+        :param callback: 阈值平移后以新阈值调用，如 detector.set_threshold
+        """
+        self.entries[name] = [[list(t) for t in threshold], self.l_mean, callback, 0]
+        callback(threshold)
+
+    def unregister(self, name):
+        """取消登记，并以基准阈值回调一次（撤销已应用的平移）"""
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            entry[2]([list(t) for t in entry[0]])
+
+    def _measure(self, img):
+        """在稀疏网格上估计全局 L 均值"""
+        src = self.bridge.view(img)
+        grid = src[::self.grid_step, ::self.grid_step]
+        if grid.ndim == 3:
+            # 先求各通道均值再加权，避免逐像素运算
+            r, g, b = grid.reshape(-1, grid.shape[2]).mean(axis=0)[:3]
+            gray = 0.299 * r + 0.587 * g + 0.114 * b
+        else:
+            gray = grid.mean()
+        # 灰度 -> 线性亮度 -> CIE L*
+        y = (gray / 255.0) ** 2.2
+        if y > 0.008856:
+            return 116.0 * y ** (1.0 / 3.0) - 16.0
+        return 903.3 * y
+
+    def update(self, img):
+        """
+        每帧调用：更新亮度估计，偏移变化足够大时回调新阈值
+        :return: 当前 L 均值
+        """
+        l_now = self._measure(img)
+        if self.l_mean is None:
+            self.l_mean = l_now
+        else:
+            self.l_mean += self.alpha * (l_now - self.l_mean)
+
+        for entry in self.entries.values():
+            base, ref, callback, applied = entry
+            if ref is None:
+                entry[1] = ref = self.l_mean
+            shift = int(round(self.l_mean - ref))
+            if abs(shift - applied) < self.MIN_SHIFT:
+                continue
+            entry[3] = shift
+            callback([self._shift(t, shift) for t in base])
+        return self.l_mean
+
+    def _shift(self, t, shift):
+        """平移 L 上下界并限制在 0~100"""
+        shifted = list(t)
+        shifted[0] = max(0, min(100, t[0] + shift))
+        shifted[1] = max(0, min(100, t[1] + shift))
+        return shifted
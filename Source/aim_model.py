@@ -0,0 +1,197 @@
+from maix import image, time
+import numpy as np
+
+
+def poly_terms(x, y):
+    """二次多项式项 [1, x, y, x², xy, y²]（支持数组批量计算）"""
+    return np.stack([np.ones_like(x), x, y, x * x, x * y, y * y], axis=-1)
+
+
+class AimModel:
+    def __init__(self, forward=None, inverse=None, size=None):
+        """
+        舵机角度与激光点像素坐标之间的映射（二次多项式，正反两个方向分别拟合）
+        - forward: (角度180, 角度270) -> (像素x, 像素y)
+        - inverse: (像素x, 像素y) -> (角度180, 角度270)，用于前馈瞄准
+        像素坐标为标定时检测流（去畸变后）的坐标，只在相同分辨率下有效
+        :param forward: 2x6 系数
+        :param inverse: 2x6 系数
+        :param size: 标定时的检测图像分辨率 (w, h)
+        """
+        self.forward = None if forward is None else np.array(forward, dtype=np.float64)
+        self.inverse = None if inverse is None else np.array(inverse, dtype=np.float64)
+        self.size = None if size is None else tuple(size)
+        self.rms = None    # 反向映射拟合残差（度）
+
+    def fit(self, samples):
+        """
+        由标定样本拟合
+        :param samples: [((角度180, 角度270), (像素x, 像素y))]，至少6组
+        :return: 反向映射的 RMS 残差（度）
+        """
+        if len(samples) < 6:
+            raise ValueError(f"标定样本不足（{len(samples)} 组），至少需要6组")
+        angles = np.array([s[0] for s in samples], dtype=np.float64)
+        pixels = np.array([s[1] for s in samples], dtype=np.float64)
+        # 两轴共用同一个设计矩阵，一次求解
+        A = poly_terms(angles[:, 0], angles[:, 1])
+        self.forward = np.linalg.lstsq(A, pixels, rcond=None)[0].T
+        B = poly_terms(pixels[:, 0], pixels[:, 1])
+        self.inverse = np.linalg.lstsq(B, angles, rcond=None)[0].T
+        residual = B @ self.inverse.T - angles
+        self.rms = float(np.sqrt((residual ** 2).mean()))
+        return self.rms
+
+    def angles_for(self, x, y):
+        """像素坐标 -> 舵机角度 (角度180, 角度270)"""
+        t = (1.0, x, y, x * x, x * y, y * y)
+        c = self.inverse
+        return (float(sum(c[0, i] * t[i] for i in range(6))),
+                float(sum(c[1, i] * t[i] for i in range(6))))
+
+    def pixel_for(self, angle_180, angle_270):
+        """舵机角度 -> 像素坐标"""
+        t = poly_terms(np.float64(angle_180), np.float64(angle_270))
+        x, y = self.forward @ t
+        return float(x), float(y)
+
+    def ready(self):
+        return self.inverse is not None
+
+    def to_dict(self):
+        """转为可保存到 ConfigStore 的字典"""
+        return {"forward": self.forward.tolist(), "inverse": self.inverse.tolist(), "rms": self.rms,
+                "size": None if self.size is None else list(self.size)}
+
+    @classmethod
+    def from_dict(cls, data, size=None):
+        """
+        由 to_dict() 的结果创建
+        :param size: 当前检测图像分辨率，与标定时不同则抛出 ValueError
+        """
+        model = cls(data["forward"], data["inverse"], data.get("size"))
+        if size is not None and model.size is not None and model.size != tuple(size):
+            raise ValueError(f"瞄准模型标定分辨率 {model.size} 与当前检测分辨率 {tuple(size)} 不一致，需要重新标定")
+        model.rms = data.get("rms")
+        return model
+
+
+class AimCalibrator:
+    GRID = (5, 5)         # 扫描网格（180舵机步数, 270舵机步数）
+    SETTLE_MS = 400       # 舵机到位等待时间
+    SAMPLES = 3           # 每个网格点取几帧激光点平均
+
+    def __init__(self, servos, spot_detector, range_180, range_270, grid=GRID, undistorter=None):
+        """
+        扫描舵机角度网格并记录激光点位置，用于拟合 AimModel（非阻塞，每帧调用 step）
+        :param servos: ServoGroup，通道顺序 [180舵机, 270舵机]
+        :param spot_detector: 激光点 BlobDetector
+        :param range_180: 180舵机扫描范围 (最小角度, 最大角度)
+        :param range_270: 270舵机扫描范围 (最小角度, 最大角度)
+        :param grid: 扫描网格
+        :param undistorter: 与控制相同的去畸变对象，None 使用原始像素坐标
+        step() 需传入与控制相同的检测图像（Capture 检测流），模型记录其分辨率
+        """
+        self.servos = servos
+        self.spot_detector = spot_detector
+        self.undistorter = undistorter
+        self.points = [(a, b) for a in np.linspace(range_180[0], range_180[1], grid[0])
+                       for b in np.linspace(range_270[0], range_270[1], grid[1])]
+        self.index = 0
+        self.samples = []      # [((角度180, 角度270), (像素x, 像素y))]
+        self._spots = []
+        self._moved_at = None
+        self.missed = 0        # 未检测到激光点的网格点数
+        self.size = None       # 检测图像分辨率
+
+    def finished(self):
+        return self.index >= len(self.points)
+
+    def step(self, img):
+        """
+        每帧调用：移动到下一个网格点，等待到位后采样激光点
+        :return: 是否已完成全部网格点
+        """
+        if self.finished():
+            return True
+        self.size = (img.width(), img.height())
+        angles = self.points[self.index]
+        now = time.ticks_ms()
+        if self._moved_at is None:
+            self.servos.set_angles(angles)
+            self._moved_at = now
+            self._spots = []
+            return False
+        if now - self._moved_at < self.SETTLE_MS:
+            return False
+
+        spot, _, _ = self.spot_detector.detect_max_blob(img)
+        if spot is not None:
+            if self.undistorter is not None:
+                spot = self.undistorter.point(*spot)
+            self._spots.append(spot)
+        if len(self._spots) >= self.SAMPLES or now - self._moved_at > self.SETTLE_MS * 3:
+            if self._spots:
+                x = sum(p[0] for p in self._spots) / len(self._spots)
+                y = sum(p[1] for p in self._spots) / len(self._spots)
+                self.samples.append((tuple(float(a) for a in angles), (x, y)))
+            else:
+                self.missed += 1
+            self.index += 1
+            self._moved_at = None
+        return self.finished()
+
+    def draw(self, img, map_point=None):
+        """
+        绘制已采样的激光点
+        :param map_point: 检测坐标到显示坐标的映射函数，None 表示两者相同
+        """
+        for _, (x, y) in self.samples:
+            if self.undistorter is not None:
+                x, y = self.undistorter.distort_point(x, y)   # 样本为去畸变坐标
+            if map_point:
+                x, y = map_point(x, y)
+            img.draw_cross(int(x), int(y), image.COLOR_GREEN, 3, 1)
+        img.draw_string(4, 4, "aim %d/%d" % (self.index, len(self.points)), image.COLOR_RED)
+
+    def fit(self):
+        """拟合并返回 AimModel"""
+        model = AimModel(size=self.size)
+        model.fit(self.samples)
+        print(f"瞄准标定完成: {len(self.samples)} 点, 丢失 {self.missed} 点, RMS = {model.rms:.2f} 度")
+        return model
+
+
+if __name__ == "__main__":
+    from maix import display, app
+    from servo import ServoController, ServoGroup
+    from blob_detect import BlobDetector
+    from config_store import ConfigStore
+    from capture import Capture
+    from lens_calibration import Undistorter
+
+    # 与 main.py 使用相同的检测流、去畸变和舵机标定，模型坐标与运行时一致
+    config_store = ConfigStore("/root/maixcam_config.json")
+    capture = Capture((320, 240), config_store.get("detect_resolution"), config_store.get("detect_format"))
+    undistorter = None
+    if config_store.get("lens_calibration"):
+        undistorter = Undistorter.load(config_store.get("lens_calibration"), capture.detect_size)
+    disp = display.Display()
+    servo_180 = ServoController(180)
+    servo_270 = ServoController(270)
+    if config_store.get("servo_180"):
+        servo_180.set_calibration(config_store.get("servo_180"))
+    if config_store.get("servo_270"):
+        servo_270.set_calibration(config_store.get("servo_270"))
+    servos = ServoGroup([servo_180, servo_270])
+    spot_detector = BlobDetector(config_store.get("red_threshold", [[0, 80, 40, 80, 10, 80]]), 5)
+    calibrator = AimCalibrator(servos, spot_detector, (60, 120), (105, 165), undistorter=undistorter)
+    while not app.need_exit() and not calibrator.finished():
+        img, det_img = capture.read()
+        calibrator.step(det_img)
+        calibrator.draw(img, capture.map_point)
+        disp.show(img)
+    model = calibrator.fit()
+    config_store.set("aim_model", model.to_dict())  # main.py 启动时加载
+    w, h = capture.detect_size
+    print("中心点角度:", model.angles_for(w / 2, h / 2))
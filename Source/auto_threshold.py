@@ -0,0 +1,94 @@
+from maix import image
+
+# LAB 各通道取值范围
+LAB_RANGES = ((0, 100), (-128, 127), (-128, 127))
+LAB_FULL_THRESHOLD = [[0, 100, -128, 127, -128, 127]]
+
+
+class AutoThreshold:
+    ROI_SIZE = 16          # 采样区域边长（像素）
+    LOW_PERCENTILE = 0.05  # 下界百分位
+    HIGH_PERCENTILE = 0.95 # 上界百分位
+    MARGIN = (4, 4, 4)     # 在百分位基础上向外扩展的余量 (L, A, B)
+    DECAY = 0.9            # 历史直方图衰减系数，1.0 为全量累积
+
+    def __init__(self, roi_size=ROI_SIZE, low=LOW_PERCENTILE, high=HIGH_PERCENTILE, decay=DECAY):
+        """
+        根据触摸区域的 LAB 直方图自动给出阈值建议
+        每帧只统计一次采样区域并累加到运行直方图，不重复扫描历史帧
+        :param roi_size: 采样区域边长
+        :param low: 下界百分位
+        :param high: 上界百分位
+        :param decay: 历史直方图衰减系数
+        """
+        self.roi_size = roi_size
+        self.low = low
+        self.high = high
+        self.decay = decay
+        self.roi = None
+        self.reset()
+
+    def reset(self):
+        """清空运行直方图"""
+        self.acc = [None, None, None]   # L/A/B 累积直方图
+        self.frames = 0
+
+    def set_point(self, x, y, width, height):
+        """以 (x, y) 为中心设置采样区域，并重新开始统计"""
+        half = self.roi_size // 2
+        x0 = max(0, min(int(x) - half, width - self.roi_size))
+        y0 = max(0, min(int(y) - half, height - self.roi_size))
+        self.roi = [x0, y0, min(self.roi_size, width), min(self.roi_size, height)]
+        self.reset()
+
+    def update(self, img):
+        """统计当前帧采样区域并累加到运行直方图"""
+        if self.roi is None:
+            return False
+        hist = img.get_histogram(thresholds=LAB_FULL_THRESHOLD, roi=self.roi)
+        channels = (hist.bins(), hist.a_bins(), hist.b_bins())
+        for c, bins in enumerate(channels):
+            acc = self.acc[c]
+            if acc is None or len(acc) != len(bins):
+                self.acc[c] = list(bins)
+                continue
+            decay = self.decay
+            for i, v in enumerate(bins):
+                acc[i] = acc[i] * decay + v
+        self.frames += 1
+        return True
+
+    def _percentile_value(self, acc, lo, hi, p):
+        """由累积直方图求百分位对应的通道值"""
+        total = sum(acc)
+        if total <= 0:
+            return lo
+        target = total * p
+        cum = 0.0
+        n = len(acc)
+        for i, v in enumerate(acc):
+            cum += v
+            if cum >= target:
+                return lo + (hi - lo) * i / (n - 1)
+        return hi
+
+    def suggest(self):
+        """
+        给出阈值建议
+        :return: [Lmin, Lmax, Amin, Amax, Bmin, Bmax]，尚无数据时返回 None
+        """
+        if self.frames == 0:
+            return None
+        result = []
+        for c, (lo, hi) in enumerate(LAB_RANGES):
+            acc = self.acc[c]
+            vmin = self._percentile_value(acc, lo, hi, self.low) - self.MARGIN[c]
+            vmax = self._percentile_value(acc, lo, hi, self.high) + self.MARGIN[c]
+            result.append(int(max(lo, min(vmin, hi))))
+            result.append(int(max(lo, min(vmax, hi))))
+        return result
+
+    def draw(self, img):
+        """绘制采样区域"""
+        if self.roi:
+            img.draw_rect(*self.roi, image.COLOR_YELLOW, 1)
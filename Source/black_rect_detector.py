@@ -1,8 +1,59 @@
 from maix import image, display, camera, app
 from blob_detect import BlobDetector
+from cv_bridge import CVBridge
+import numpy as np
 import math
+from lazy_module import lazy_import
+
+cv2 = lazy_import("cv2")   # 仅边框模式使用
+
+# 拒绝原因（按检查顺序，廉价检查在前）
+REJECT_REASONS = ("no_blob", "no_rect", "band", "corners", "small", "aspect", "fill", "angle")
+
+# 外边框归一化后的单位正方形（顺时针，左上角起）
+UNIT_SQUARE = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
+
+
+def order_corners(pts):
+    """
+    四个点按 左上、右上、右下、左下 排序
+    按绕中心的角度排成顺时针，再以 x+y 最小的点为起点；旋转45度附近也不会重复取同一个点
+    """
+    c = pts.mean(axis=0)
+    clockwise = pts[np.argsort(np.arctan2(pts[:, 1] - c[1], pts[:, 0] - c[0]))]
+    start = int(np.argmin(clockwise.sum(axis=1)))
+    return np.roll(clockwise, -start, axis=0).astype(np.float32)
+
+
+def align_corners(quad, ref):
+    """将已排序的四边形循环移位，使每个角点与 ref 中对应角点的距离之和最小"""
+    shifts = [np.roll(quad, -k, axis=0) for k in range(4)]
+    return min(shifts, key=lambda q: float(np.linalg.norm(q - ref, axis=1).sum()))
+
+
+def quad_points(quad):
+    """四边形数组转为整数坐标点列表"""
+    return [(int(round(px)), int(round(py))) for px, py in quad]
+
+
+def contour_quad(contour):
+    """轮廓拟合为四边形，多边形逼近失败时退化为最小外接矩形"""
+    approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+    if len(approx) == 4:
+        return order_corners(approx.reshape(4, 2).astype(np.float32))
+    return order_corners(cv2.boxPoints(cv2.minAreaRect(contour)).astype(np.float32))
+
 
 class BlackRectangleDetector:
+    ROI_MARGIN = 10   # 色块ROI向外扩展的边距（像素）
+    MIN_AREA = 100    # 四边形最小面积（像素）
+    MAX_ASPECT = 4.0  # 长边/短边 上限
+    MIN_FILL = 0.15   # 色块像素数 / 四边形面积 的下限（胶带边框只占四边形内部的一部分）
+    MAX_FILL = 1.3    # 上限，超过说明四边形只框住了色块的一部分
+    ANGLE_TOL = 45    # 内角与90度的最大偏差（度）
+    MAX_JUMP = 40     # 中心点帧间跳变达到该值时时间一致性得分为0（像素）
+    MAX_MISSED = 5    # 连续拒绝超过该帧数后不再参考上一次结果
+
     def __init__(self, cam, black_threshold):
         # 初始化摄像头
         self.cam = cam
@@ -14,6 +65,20 @@ class BlackRectangleDetector:
         self.max_blob = None
         self.target_rect = None
         self.corners = None
+        self.roi_margin = self.ROI_MARGIN
+        # 评分与拒绝统计
+        self.confidence = 0.0
+        self.scores = {}          # 最近一次检测的各项指标
+        self.reject_reason = None
+        self.rejects = dict.fromkeys(REJECT_REASONS, 0)
+        self.accepted = 0
+        self.missed = 0
+        # 黑色边框（胶带）模式：同时求内外轮廓，返回中线四边形
+        self.band_mode = False
+        self.outer = None         # 外轮廓四边形 (4, 2)
+        self.inner = None         # 内轮廓四边形 (4, 2)
+        self.band_width = 0.0     # 边框线宽估计（像素）
+        self.bridge = CVBridge.get_instance()
 
 
     def detect_rect_in_blob(self, img, blob):
@@ -21,8 +86,11 @@ class BlackRectangleDetector:
         # 获取色块ROI (x, y, width, height)
         x, y, w, h = blob.rect()
         # 扩展ROI边界，确保矩形完整
-        roi = (max(0, x-10), max(0, y-10), min(img.width(), x+w+10), min(img.height(), y+h+10))
-        # roi = (max(0, x), max(0, y), min(img.width(), x+w), min(img.height(), y+h))
+        m = self.roi_margin
+        x0, y0 = max(0, x-m), max(0, y-m)
+        x1, y1 = min(img.width(), x+w+m), min(img.height(), y+h+m)
+        # find_rects 的 roi 格式为 (x, y, w, h)
+        roi = (x0, y0, x1 - x0, y1 - y0)
         # 在ROI内检测矩形（移除max_rects参数）
         rects = img.find_rects(
             threshold=5000,        # 矩形检测阈值
@@ -47,35 +115,188 @@ class BlackRectangleDetector:
         cy = sum(point[1] for point in corners) // 4
         return corners, (cx, cy)
 
-    def process_frame(self):
-        """处理单帧图像，返回矩形四个顶点和中心点"""
+    def process_frame(self, img=None):
+        """处理单帧图像，返回矩形四个顶点和中心点（img 为 None 时自行读取摄像头）"""
         # 读取图像
-        img = self.cam.read()
+        if img is None:
+            img = self.cam.read()
         if img is None:
             return None
 
         # 步骤1: 寻找最大黑色色块
         _, _, self.max_blob = self.blob_detector.detect_max_blob(img)
         if not self.max_blob:
-            return None
+            return self._reject("no_blob")
 
         # 步骤2: 在色块内检测矩形
+        if self.band_mode:
+            # 边框模式：中线四边形作为激光路径目标，评分与时间一致性都针对中线四边形
+            mid = self.detect_band(img, self.max_blob)
+            if mid is None:
+                return self._reject("band")
+            return self._score(quad_points(mid), self._center(mid), self.max_blob)
+
         self.target_rect = self.detect_rect_in_blob(img, self.max_blob)
         if not self.target_rect:
-            return None
+            return self._reject("no_rect")
 
         # 步骤3: 计算矩形顶点和中心点
-        self.corners, self.rect_center = self.calculate_center(self.target_rect)
-        if self.rect_center is None:
+        corners, center = self.calculate_center(self.target_rect)
+        if center is None:
+            return self._reject("corners")
+
+        # 步骤4: 由廉价到昂贵逐项检查，任一项不通过立即返回
+        return self._score(corners, center, self.max_blob)
+
+    def detect_band(self, img, blob):
+        """
+        在色块ROI的小块裁剪图上求黑色边框的外轮廓与内轮廓（孔洞），
+        在外轮廓归一化的坐标系中取内外角点中点，再映射回图像，得到透视正确的中线四边形
+        :return: 中线四边形 (4, 2) float32，未找到内轮廓返回 None
+        """
+        x, y, w, h = blob.rect()
+        m = self.roi_margin
+        x0, y0 = max(0, x - m), max(0, y - m)
+        x1, y1 = min(img.width(), x + w + m), min(img.height(), y + h + m)
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None
+
+        # 只对ROI裁剪区域做灰度化与二值化（零拷贝切片 + 预分配缓冲区）
+        # 缓冲区按整帧大小只分配一次，每帧取左上角的子视图，ROI尺寸抖动时不重新分配
+        src = self.bridge.view(img)
+        crop = src[y0:y1, x0:x1]
+        frame_size = src.shape[:2]
+        h, w = y1 - y0, x1 - x0
+        if crop.ndim == 3:
+            gray = self.bridge.scratch("band_gray", frame_size)[:h, :w]
+            code = cv2.COLOR_BGR2GRAY if img.format() == image.Format.FMT_BGR888 else cv2.COLOR_RGB2GRAY
+            cv2.cvtColor(crop, code, dst=gray)
+        else:
+            gray = crop
+        binary = self.bridge.scratch("band_binary", frame_size)[:h, :w]
+        cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU, dst=binary)
+
+        # 两层轮廓：外边界 + 孔洞
+        contours, hierarchy = cv2.findContours(binary, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+        if hierarchy is None:
+            return None
+        hierarchy = hierarchy[0]
+        outer_idx = max((i for i in range(len(contours)) if hierarchy[i][3] < 0),
+                        key=lambda i: cv2.contourArea(contours[i]), default=None)
+        if outer_idx is None:
             return None
+        holes = [i for i in range(len(contours)) if hierarchy[i][3] == outer_idx]
+        if not holes:
+            return None
+        inner_idx = max(holes, key=lambda i: cv2.contourArea(contours[i]))
+
+        offset = np.array([x0, y0], dtype=np.float32)
+        outer = contour_quad(contours[outer_idx]) + offset
+        # 内外轮廓各自排序在45度附近可能起点不同，按最近角点配对后再取中点，避免中线扭曲
+        inner = align_corners(contour_quad(contours[inner_idx]) + offset, outer)
+
+        # 外轮廓 -> 单位正方形，中点在归一化坐标系中计算，再逆变换回图像
+        H = cv2.getPerspectiveTransform(outer, UNIT_SQUARE)
+        inner_n = cv2.perspectiveTransform(inner.reshape(1, 4, 2), H)[0]
+        mid_n = (UNIT_SQUARE + inner_n) / 2
+        mid = cv2.perspectiveTransform(mid_n.reshape(1, 4, 2), np.linalg.inv(H))[0]
+
+        self.outer, self.inner = outer, inner
+        self.band_width = float(np.linalg.norm(outer - inner, axis=1).mean() / math.sqrt(2))
+        return mid
+
+    def _center(self, quad):
+        cx, cy = quad.mean(axis=0)
+        return int(cx), int(cy)
 
-        # 检查角度是否接近90度（过滤旋转或不规则矩形）
-        angles = calculate_angles(self.corners)  # 需实现角度计算函数
-        if all(abs(angle - 90) < 45 for angle in angles):
-            return (self.corners, self.rect_center)
-        return (None, None)
+    def _reject(self, reason):
+        self.reject_reason = reason
+        self.rejects[reason] += 1
+        self.confidence = 0.0
+        self.missed += 1
+        if self.missed > self.MAX_MISSED:
+            self.rect_center = None
+        return None
 
-    import math
+    def _score(self, corners, center, blob):
+        """
+        检查并评分
+        :return: (四个顶点, 中心点, 置信度)，未通过返回 None（原因见 reject_reason）
+        """
+        scores = self.scores = {}
+        # 面积（鞋带公式）
+        area = 0
+        for i in range(4):
+            x1, y1 = corners[i]
+            x2, y2 = corners[(i + 1) % 4]
+            area += x1 * y2 - x2 * y1
+        area = abs(area) / 2
+        scores["area"] = area
+        if area < self.MIN_AREA:
+            return self._reject("small")
+
+        # 长宽比：对边平均长度之比
+        sides = [math.hypot(corners[(i + 1) % 4][0] - corners[i][0],
+                            corners[(i + 1) % 4][1] - corners[i][1]) for i in range(4)]
+        a = (sides[0] + sides[2]) / 2
+        b = (sides[1] + sides[3]) / 2
+        aspect = max(a, b) / max(1e-6, min(a, b))
+        scores["aspect"] = aspect
+        if aspect > self.MAX_ASPECT:
+            return self._reject("aspect")
+
+        # 填充率：色块像素数 / 四边形面积
+        fill = blob.pixels() / area
+        scores["fill"] = fill
+        if not self.MIN_FILL <= fill <= self.MAX_FILL:
+            return self._reject("fill")
+
+        # 角度：逐个计算，第一个超限的角即退出
+        angle_error = 0.0
+        for i in range(4):
+            error = abs(corner_angle(corners, i) - 90)
+            if error >= self.ANGLE_TOL:
+                scores["angle_error"] = error
+                return self._reject("angle")
+            angle_error = max(angle_error, error)
+        scores["angle_error"] = angle_error
+
+        # 时间一致性：与上一次接受结果的中心距离（只计分，不拒绝）
+        temporal = 1.0
+        if self.rect_center is not None:
+            jump = math.hypot(center[0] - self.rect_center[0], center[1] - self.rect_center[1])
+            temporal = max(0.0, 1 - jump / self.MAX_JUMP)
+        scores["temporal"] = temporal
+
+        # 边框本身填充率就低，只在色块溢出四边形（fill > 1）时降低置信度
+        self.confidence = min(1.0, 1.0 / fill) * (1 - angle_error / self.ANGLE_TOL) * (0.5 + 0.5 * temporal)
+        self.corners, self.rect_center = corners, center
+        self.reject_reason = None
+        self.accepted += 1
+        self.missed = 0
+        return (corners, center, self.confidence)
+
+    def stats(self):
+        """返回 (接受次数, {拒绝原因: 次数})"""
+        return self.accepted, dict(self.rejects)
+
+
+def corner_angle(corners, i):
+    """计算第 i 个顶点的内角（度）"""
+    num_points = len(corners)
+    p_prev = corners[(i - 1) % num_points]
+    p_curr = corners[i]
+    p_next = corners[(i + 1) % num_points]
+    vec1 = (p_prev[0] - p_curr[0], p_prev[1] - p_curr[1])
+    vec2 = (p_next[0] - p_curr[0], p_next[1] - p_curr[1])
+    mag1 = math.sqrt(vec1[0]**2 + vec1[1]**2)
+    mag2 = math.sqrt(vec2[0]**2 + vec2[1]**2)
+    if mag1 == 0 or mag2 == 0:
+        return 0.0
+    cos_theta = (vec1[0] * vec2[0] + vec1[1] * vec2[1]) / (mag1 * mag2)
+    cos_theta = max(min(cos_theta, 1.0), -1.0)
+    theta = math.acos(cos_theta) * (180.0 / math.pi)
+    return min(theta, 360.0 - theta)
 
 def calculate_angles(corners):
     """
@@ -85,46 +306,7 @@ def calculate_angles(corners):
     返回:
         angles: 包含四个角度的列表 (单位: 度)
     """
-    angles = []
-    num_points = len(corners)
-    
-    for i in range(num_points):
-        # 获取当前顶点、前一个顶点和后一个顶点 (通过取模实现循环)
-        p_prev = corners[(i - 1) % num_points]
-        p_curr = corners[i]
-        p_next = corners[(i + 1) % num_points]
-        
-        # 计算向量 (p_curr -> p_prev) 和 (p_curr -> p_next)
-        vec1 = (p_prev[0] - p_curr[0], p_prev[1] - p_curr[1])
-        vec2 = (p_next[0] - p_curr[0], p_next[1] - p_curr[1])
-        
-        # 计算向量点积
-        dot_product = vec1[0] * vec2[0] + vec1[1] * vec2[1]
-        
-        # 计算向量模长
-        mag1 = math.sqrt(vec1[0]**2 + vec1[1]**2)
-        mag2 = math.sqrt(vec2[0]**2 + vec2[1]**2)
-        
-        # 避免除零错误
-        if mag1 == 0 or mag2 == 0:
-            angles.append(0.0)
-            continue
-        
-        # 计算夹角余弦值
-        cos_theta = dot_product / (mag1 * mag2)
-        
-        # 防止数值误差导致的超出范围问题
-        cos_theta = max(min(cos_theta, 1.0), -1.0)
-        
-        # 转换为角度
-        theta = math.acos(cos_theta) * (180.0 / math.pi)
-        
-        # 对于矩形，内角应该接近90度，外角接近270度，但我们只关心内角
-        # 取最小角度 (内角和外角之和为360度，取较小的那个)
-        theta = min(theta, 360.0 - theta)
-        angles.append(theta)
-    
-    return angles
+    return [corner_angle(corners, i) for i in range(len(corners))]
 
 # 使用示例
 if __name__ == "__main__":
@@ -133,7 +315,9 @@ if __name__ == "__main__":
     while not app.need_exit():
         result = detector.process_frame()
         if result:
-            corners, center = result
-            print(f"顶点: {corners}, 中心点: {center}")
+            corners, center, confidence = result
+            print(f"顶点: {corners}, 中心点: {center}, 置信度: {confidence:.2f}")
+        else:
+            print(f"未检测到: {detector.reject_reason}")
         # time.sleep_ms(10)
     del cam
\ No newline at end of file
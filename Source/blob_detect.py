@@ -1,3 +1,10 @@
+from maix import image, time
+from cv_bridge import CVBridge
+from tracker import MultiTargetTracker
+from lazy_module import lazy_import
+
+cv2 = lazy_import("cv2")   # 仅 LaserSpotDetector 使用
+
 class BlobDetector:
     def __init__(self, threshold, pixels_threshold=1000):
         """
@@ -15,6 +22,8 @@ class BlobDetector:
         self.filter_data_y = [0.0] * 4  # 初始化滤波窗口数组
         self.data_pointer_x = 0  # 初始化指针
         self.data_pointer_y = 0  # 初始化指针
+        self.tracker = MultiTargetTracker()  # 多色块跟踪（detect_tracked 使用）
+        self.target_id = None    # 当前锁定的目标轨迹ID
 
     def set_threshold(self, threshold):
         self.threshold = threshold
@@ -56,6 +65,35 @@ class BlobDetector:
 
         return None, None, None
 
+    def detect_tracked(self, img):
+        """
+        检测所有色块并跨帧跟踪，目标锁定在同一轨迹上，
+        只有目标轨迹消失后才重新选择面积最大的稳定轨迹
+        :param img: 输入图像对象
+        :return: (目标轨迹或 None, 所有轨迹列表)
+        """
+        blobs = img.find_blobs(
+            self.threshold,
+            pixels_threshold=self.pixels_threshold
+        )
+        detections = [(b.cx(), b.cy(), b.w(), b.h()) for b in blobs] if blobs else []
+        self.tracker.update(detections)
+
+        target = self.tracker.get(self.target_id) if self.target_id is not None else None
+        if target is None:
+            candidates = self.tracker.confirmed()
+            target = max(candidates, key=lambda t: t.area()) if candidates else None
+            self.target_id = target.id if target else None
+
+        if target:
+            self.blob_center = target.center()
+            self.image_center = (img.width() // 2, img.height() // 2)
+            self.distance = (
+                self.blob_center[0] - self.image_center[0],
+                self.blob_center[1] - self.image_center[1]
+            )
+        return target, self.tracker.tracks
+
     def sliding_filter(self, data_x, data_y):
         # 将新数据存入滑动窗口
         self.filter_data_x[self.data_pointer_x] = data_x
@@ -72,82 +110,152 @@ class BlobDetector:
         return int(filtered_value_x), int(filtered_value_y)
 
 
+class LaserSpotDetector:
+    # 帧差法激光点检测参数
+    DIFF_THRESHOLD = 25      # 差分二值化阈值
+    MAX_AREA = 500           # 激光点最大轮廓面积，过滤大范围运动
+    DILATE_ITERATIONS = 2    # 膨胀次数，填充激光点内部空洞
+    COLOR_MARGIN = 20        # 红/绿判定所需的通道差
+
+    def __init__(self, width, height, roi=None, diff_threshold=DIFF_THRESHOLD, max_area=MAX_AREA, name="laser"):
+        """
+        帧差法激光点检测器，所有中间缓冲区预先分配并在每帧原地复用
+        :param width: 帧宽度
+        :param height: 帧高度
+        :param roi: 检测区域 (x, y, w, h)，None 为全图
+        :param diff_threshold: 差分二值化阈值
+        :param max_area: 激光点最大轮廓面积
+        :param name: 缓冲区名称前缀（多个实例时需不同）
+        """
+        self.width = width
+        self.height = height
+        self.diff_threshold = diff_threshold
+        self.max_area = max_area
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        self.bridge = CVBridge.get_instance()
 
-""" 帧差法
-from maix import image, camera, display, app
-import cv2
+        # 乒乓灰度缓冲区：当前帧写入 gray[cur]，上一帧保留在 gray[1 - cur]
+        size = (height, width)
+        self.gray = [self.bridge.scratch(name + "_gray0", size), self.bridge.scratch(name + "_gray1", size)]
+        self.cur = 0
+        self.primed = False
+        self.diff = self.bridge.scratch(name + "_diff", size)
+        self.binary = self.bridge.scratch(name + "_binary", size)
+        self.dilated = self.bridge.scratch(name + "_dilated", size)
 
-# 初始化摄像头和显示器
-cam = camera.Camera(320, 240)
-disp = display.Display()
+        self.set_roi(roi)
+        self.point = (0, 0)
+        self.color = None
 
-# 创建形态学操作（膨胀）使用的核
-kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+    def set_roi(self, roi):
+        """设置检测区域，切换区域后需重新积累一帧"""
+        if roi is None:
+            roi = (0, 0, self.width, self.height)
+        x, y, w, h = roi
+        x = max(0, min(x, self.width - 1))
+        y = max(0, min(y, self.height - 1))
+        w = max(1, min(w, self.width - x))
+        h = max(1, min(h, self.height - y))
+        self.roi = (x, y, w, h)
+        self.primed = False
 
-# 初始化激光点坐标位置变量
-point_x = 0
-point_y = 0
+    def _classify(self, img_cv, cx, cy):
+        """取质心 3x3 邻域均值区分红/绿激光（图像为 RGB 排列）"""
+        patch = img_cv[max(0, cy - 1):cy + 2, max(0, cx - 1):cx + 2]
+        r = int(patch[:, :, 0].mean())
+        g = int(patch[:, :, 1].mean())
+        if r > g + self.COLOR_MARGIN:
+            return "red"
+        if g > r + self.COLOR_MARGIN:
+            return "green"
+        return None
 
-# 用于存储上一帧灰度图像的变量
-last_img_cv_gray = None
+    def detect(self, img):
+        """
+        检测激光点
+        :param img: 输入图像对象（RGB888）
+        :return: 成功返回 (中心点坐标, 颜色 "red"/"green"/None)，失败返回 (None, None)
+        """
+        x, y, w, h = self.roi
+        # 不拷贝地获取图像数据，只处理ROI区域
+        img_cv = self.bridge.view(img)
+        src = img_cv[y:y + h, x:x + w]
 
-# 主循环：直到应用要求退出
-while not app.need_exit():
-    # 从摄像头读取一帧图像
-    img = cam.read()
+        prev = self.gray[self.cur][y:y + h, x:x + w]
+        self.cur = 1 - self.cur
+        gray = self.gray[self.cur][y:y + h, x:x + w]
+        cv2.cvtColor(src, cv2.COLOR_RGB2GRAY, dst=gray)
+        if not self.primed:
+            self.primed = True
+            return None, None
 
-    # 将maix图像转换为OpenCV格式图像 (BGR格式)
-    img_cv = image.image2cv(img, False, False)
+        diff = self.diff[y:y + h, x:x + w]
+        binary = self.binary[y:y + h, x:x + w]
+        dilated = self.dilated[y:y + h, x:x + w]
+        cv2.absdiff(gray, prev, dst=diff)
+        cv2.threshold(diff, self.diff_threshold, 255, cv2.THRESH_BINARY, dst=binary)
+        cv2.dilate(binary, self.kernel, dst=dilated, iterations=self.DILATE_ITERATIONS)
 
-    # 将BGR图像转换为灰度图像
-    img_cv_gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        best = None
+        best_area = 0
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            # 激光点不大，过滤掉大范围的轮廓，取剩余中最大的
+            if best_area < area < self.max_area:
+                best_area = area
+                best = contour
+        if best is None:
+            return None, None
 
-    # 如果是第一帧，则保存为“上一帧灰度图像”
-    if last_img_cv_gray is None:
-        last_img_cv_gray = img_cv_gray.copy()
+        M = cv2.moments(best)
+        if M["m00"] == 0:
+            return None, None
+        cx = int(M["m10"] / M["m00"]) + x
+        cy = int(M["m01"] / M["m00"]) + y
+        self.point = (cx, cy)
+        self.color = self._classify(img_cv, cx, cy)
+        return self.point, self.color
 
-    # 计算当前帧灰度图与上一帧灰度图的绝对值差（帧间差分）
-    img_diff = cv2.absdiff(img_cv_gray, last_img_cv_gray)
 
-    # 对差分图像进行二值化处理（阈值设为25）
-    _, img_binary = cv2.threshold(img_diff, 25, 255, cv2.THRESH_BINARY)
+def benchmark(cam, frames=200):
+    """对比帧差法与 LAB find_blobs（2023_1.find_red_spot）两种激光点检测的耗时"""
+    red_threshold = [[0, 80, 40, 80, 10, 80]]
+    laser_detector = LaserSpotDetector(cam.width(), cam.height())
+    diff_ms = 0
+    blob_ms = 0
+    for _ in range(frames):
+        img = cam.read()
+        t0 = time.ticks_ms()
+        laser_detector.detect(img)
+        t1 = time.ticks_ms()
+        blobs = img.find_blobs(red_threshold, pixels_threshold=200)
+        if blobs:
+            max(blobs, key=lambda b: b[2] * b[3])
+        t2 = time.ticks_ms()
+        diff_ms += t1 - t0
+        blob_ms += t2 - t1
+    print(f"帧差法: {diff_ms / frames:.2f} ms/帧, find_blobs: {blob_ms / frames:.2f} ms/帧")
+    return diff_ms / frames, blob_ms / frames
 
-    # 使用膨胀处理填充激光点内部的空洞（进行2次迭代）
-    img_binary = cv2.dilate(img_binary, kernel, iterations=2)
 
-    # check point 放开注释,应能黑色背景下激光点二值化后的白点
-    # img_show = image.cv2image(img_binary, False, False)
-    # disp.show(img_show)
+# 使用示例
+if __name__ == "__main__":
+    from maix import camera, display, app
 
-    # 查找轮廓
-    contours, _ = cv2.findContours(img_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    import sys
 
-    point_x, point_y = 0, 0  # 初始化坐标
+    cam = camera.Camera(320, 240)
+    disp = display.Display()
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        # 设备端耗时对比: python blob_detect.py bench
+        benchmark(cam)
+        sys.exit(0)
 
-    for contour in contours:
-        # 计算轮廓面积
-        contour_area = cv2.contourArea(contour)
-        
-        # 激光点不大，过滤掉大范围的轮廓
-        if contour_area < 500:
-            # 计算轮廓质心作为激光点位置坐标
-            M = cv2.moments(contour)
-            if M["m00"] != 0:  # 防止除零错误
-                point_x = int(M["m10"] / M["m00"])
-                point_y = int(M["m01"] / M["m00"])
-            
-            # 获取激光点轮廓的外接矩形
-            x, y, w, h = cv2.boundingRect(contour)
-            # cv2.rectangle(img_cv, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            
-            # 获取该区域的直方图统计数据，以区分红色激光点或者绿色激光点
-            hist = img.get_histogram(thresholds=[[0, 100, -128, 127, -128, 127]], 
-                                    roi=[x, y, w, h])
-            value = hist.get_statistics().a_median()  # 获取颜色中值
-            print('staticstic value = {} and contour area = {}'.format(value, contour_area))
-
-    last_img_cv_gray = img_cv_gray.copy()
-
-    img.draw_cross(point_x, point_y, image.COLOR_BLUE, 5, 2)
-    disp.show(img)
-"""
\ No newline at end of file
+    detector = LaserSpotDetector(320, 240)
+    while not app.need_exit():
+        img = cam.read()
+        point, color = detector.detect(img)
+        if point:
+            img.draw_cross(point[0], point[1], image.COLOR_BLUE, 5, 2)
+        disp.show(img)
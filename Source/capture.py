@@ -0,0 +1,69 @@
+from maix import camera, image
+
+
+class Capture:
+    def __init__(self, display_size=(320, 240), detect_size=None, detect_format=None):
+        """
+        采集配置：显示流与检测流分离，检测在低分辨率（或灰度）图像上进行
+        优先使用摄像头的多通道输出，硬件不支持时退化为软件缩放
+        :param display_size: 显示流分辨率 (w, h)
+        :param detect_size: 检测流分辨率 (w, h)，None 表示与显示流相同
+        :param detect_format: 检测流格式，如 image.Format.FMT_GRAYSCALE 或其名称 "FMT_GRAYSCALE"，None 与显示流相同
+        """
+        if isinstance(detect_format, str):
+            detect_format = getattr(image.Format, detect_format)
+        self.display_size = tuple(display_size)
+        self.detect_size = tuple(detect_size) if detect_size else self.display_size
+        self.detect_format = detect_format
+        self.cam = camera.Camera(*self.display_size)
+        self.detect_cam = None
+        # 检测流与显示流完全相同时直接复用同一帧
+        self.same = self.detect_size == self.display_size and detect_format is None
+
+        if not self.same:
+            try:
+                fmt = detect_format if detect_format is not None else self.cam.format()
+                self.detect_cam = self.cam.add_channel(*self.detect_size, fmt)
+            except Exception as e:
+                # 不支持多通道、格式或分辨率时都退化为软件缩放，不影响启动
+                print(f"摄像头多通道输出不可用，改用软件缩放: {type(e).__name__}: {e}")
+                self.detect_cam = None
+
+    def read(self):
+        """
+        读取一帧
+        :return: (显示图像, 检测图像)，任一通道读取失败返回 None
+        """
+        img = self.cam.read()
+        if img is None:
+            return None
+        if self.same:
+            return img, img
+        if self.detect_cam is not None:
+            det = self.detect_cam.read()
+            return (img, det) if det is not None else None
+        det = img.resize(*self.detect_size)
+        if self.detect_format is not None:
+            det = det.to_format(self.detect_format)
+        return img, det
+
+    def map_point(self, x, y):
+        """检测坐标 -> 显示坐标"""
+        if self.same:
+            return x, y
+        pos = image.resize_map_pos(*self.detect_size, *self.display_size,
+                                   image.Fit.FIT_FILL, int(x), int(y))
+        return pos[0], pos[1]
+
+    def map_rect(self, x, y, w, h):
+        """检测坐标矩形 -> 显示坐标矩形"""
+        if self.same:
+            return x, y, w, h
+        return tuple(image.resize_map_pos(*self.detect_size, *self.display_size,
+                                          image.Fit.FIT_FILL, int(x), int(y), int(w), int(h)))
+
+    def map_points(self, points):
+        """批量映射角点等坐标"""
+        if self.same:
+            return points
+        return [self.map_point(x, y) for x, y in points]
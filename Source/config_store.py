@@ -0,0 +1,94 @@
+from maix import time
+import json
+import os
+
+
+class ConfigStore:
+    CHECK_MS = 500   # 热加载检查周期（毫秒）
+
+    def __init__(self, path, defaults=None):
+        """
+        阈值 / PID参数 / 舵机标定 / ROI边距 等配置的持久化存储（JSON）
+        写入时先写临时文件再原子重命名，掉电不会留下半个文件
+        :param path: 配置文件路径
+        :param defaults: 默认配置，文件中缺失的键使用默认值
+        """
+        self.path = path
+        self.defaults = dict(defaults or {})
+        self.data = dict(self.defaults)
+        self._mtime = None
+        self._last_check = 0
+        self._callbacks = {}   # {键: [回调函数]}
+        self.load()
+
+    def load(self):
+        """
+        从文件加载配置，文件不存在或损坏时保留当前值
+        回调处理某个键的新值出错时，该键保留旧值，其余键照常更新
+        """
+        try:
+            stat = os.stat(self.path)
+            with open(self.path) as f:
+                loaded = json.load(f)
+        except OSError:
+            return False
+        except ValueError:
+            print(f"配置文件损坏，使用默认值: {self.path}")
+            return False
+        if not isinstance(loaded, dict):
+            print(f"配置文件顶层不是对象，忽略本次加载: {self.path}")
+            return False
+        self._mtime = stat.st_mtime
+        old = self.data
+        self.data = dict(self.defaults)
+        self.data.update(loaded)
+        # 通知值发生变化的键
+        for key, callbacks in self._callbacks.items():
+            if old.get(key) != self.data.get(key):
+                try:
+                    for callback in callbacks:
+                        callback(self.data.get(key))
+                except Exception as e:
+                    print(f"配置项 {key} 无效，保留原值: {type(e).__name__}: {e}")
+                    self.data[key] = old.get(key)
+        return True
+
+    def save(self):
+        """原子写入：临时文件 + fsync + 重命名"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime
+
+    def get(self, key, default=None):
+        return self.data.get(key, self.defaults.get(key, default))
+
+    def set(self, key, value, save=True):
+        """设置配置项，默认立即保存"""
+        self.data[key] = value
+        if save:
+            self.save()
+
+    def watch(self, key, callback):
+        """注册热加载回调，文件中该键变化时以新值调用"""
+        self._callbacks.setdefault(key, []).append(callback)
+
+    def poll(self):
+        """
+        检查文件是否被外部修改（主循环中每帧调用，内部限频）
+        :return: 是否重新加载了配置
+        """
+        now = time.ticks_ms()
+        if now - self._last_check < self.CHECK_MS:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.load()
@@ -0,0 +1,73 @@
+from maix import image
+import numpy as np
+from lazy_module import lazy_import
+
+cv2 = lazy_import("cv2")   # 只在需要灰度化等 OpenCV 运算时才导入
+
+
+class CVBridge:
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """所有 OpenCV 检测器共享同一个桥接对象，同一帧只转换一次"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        """
+        maix 图像与 NumPy 之间的零拷贝桥接
+        - view(): 当前帧的 NumPy 视图（共享内存，同一帧缓存复用）
+        - gray(): 当前帧灰度图，写入预分配缓冲区，同一帧只计算一次
+        - scratch(): 按名称管理的预分配中间缓冲区（边缘、差分、掩码等）
+        """
+        self._img = None         # 当前帧（保持引用，保证缓存有效）
+        self._view = None
+        self._gray_valid = False
+        self.pool = {}           # {名称: ndarray}
+        self.allocations = 0     # 缓冲区分配总次数
+        self.frame_allocations = 0       # 当前帧内的分配次数
+        self.last_frame_allocations = 0  # 上一帧内的分配次数
+        self.frames = 0
+
+    def _new_frame(self, img):
+        self._img = img
+        # 不拷贝，直接共享 maix 图像内存
+        self._view = image.image2cv(img, False, False)
+        self._gray_valid = False
+        self.last_frame_allocations = self.frame_allocations
+        self.frame_allocations = 0
+        self.frames += 1
+
+    def view(self, img):
+        """获取图像的 NumPy 视图（形状 (h, w) 或 (h, w, c)，行步长与原图一致）"""
+        if img is not self._img:
+            self._new_frame(img)
+        return self._view
+
+    def scratch(self, name, shape, dtype=np.uint8):
+        """获取预分配缓冲区，仅在首次使用或尺寸变化时分配"""
+        buf = self.pool.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype)
+            self.pool[name] = buf
+            self.allocations += 1
+            self.frame_allocations += 1
+        return buf
+
+    def gray(self, img):
+        """获取当前帧灰度图（结果写入 "gray" 缓冲区，同一帧多次调用不重复计算）"""
+        src = self.view(img)
+        if src.ndim == 2:
+            return src
+        gray = self.scratch("gray", src.shape[:2])
+        if not self._gray_valid:
+            code = cv2.COLOR_BGR2GRAY if img.format() == image.Format.FMT_BGR888 else cv2.COLOR_RGB2GRAY
+            cv2.cvtColor(src, code, dst=gray)
+            self._gray_valid = True
+        return gray
+
+    def stats(self):
+        """返回 (分配总次数, 上一帧分配次数, 已处理帧数)"""
+        return self.allocations, self.last_frame_allocations, self.frames
@@ -0,0 +1,131 @@
+from maix import image, time
+import socket
+import struct
+
+
+class PreviewSender:
+    HEADER = "<IHH"      # 帧号, 宽, 高
+    MAX_PACKET = 60000   # 单个 UDP 包上限，超出的帧直接丢弃
+
+    def __init__(self, host="127.0.0.1", port=8765, scale=4, quality=50):
+        """
+        缩小预览图通过本地 UDP 发送（远程查看用，不保证送达）
+        每个包: 帧头 (帧号, 宽, 高) + JPEG 数据
+        :param host: 接收端地址
+        :param port: 接收端端口
+        :param scale: 缩小倍数
+        :param quality: JPEG 质量
+        """
+        self.addr = (host, port)
+        self.scale = scale
+        self.quality = quality
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.frame_id = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, img):
+        w = max(1, img.width() // self.scale)
+        h = max(1, img.height() // self.scale)
+        data = img.resize(w, h).to_jpeg(self.quality).to_bytes()
+        self.frame_id += 1
+        if len(data) > self.MAX_PACKET:
+            self.dropped += 1
+            return False
+        try:
+            self.sock.sendto(struct.pack(self.HEADER, self.frame_id, w, h) + data, self.addr)
+        except OSError:
+            # 接收端不存在或缓冲区满时丢帧，不影响主循环
+            self.dropped += 1
+            return False
+        self.sent += 1
+        return True
+
+    def close(self):
+        self.sock.close()
+
+
+class DisplayScheduler:
+    KEEPALIVE_MS = 1000   # 变化触发模式下的最长刷新间隔
+
+    def __init__(self, disp, rate_hz=15, on_change=False, preview=None, preview_hz=5):
+        """
+        显示调度：检测与控制每帧运行，屏幕按较低帧率（或仅在画面变化时）刷新
+        每帧在绘制前调用 tick() 决定本帧是否显示，未显示的帧可跳过全部绘制
+        变化触发模式下 mark_changed() 须在同一帧的 tick() 之前调用
+        :param disp: 显示设备
+        :param rate_hz: 最高刷新率，0 或 None 表示不限
+        :param on_change: 仅在 mark_changed() 后刷新（仍受 rate_hz 限制，且至少每 KEEPALIVE_MS 刷新一次）
+        :param preview: PreviewSender，None 不发送预览
+        :param preview_hz: 预览发送帧率
+        """
+        self.disp = disp
+        self.on_change = on_change
+        self.preview = preview
+        self.set_rate(rate_hz)
+        self.preview_period = 1000 // preview_hz if preview_hz else 0
+        self.present = True       # 本帧是否显示（tick() 锁存）
+        self.dirty = True
+        self.last_show = -self.KEEPALIVE_MS
+        self.last_preview = 0
+        self.shown = 0
+        self.skipped = 0
+
+    def set_rate(self, rate_hz):
+        self.period = 1000 // rate_hz if rate_hz else 0
+
+    def set_on_change(self, on_change):
+        self.on_change = bool(on_change)
+        self.dirty = True
+
+    def mark_changed(self):
+        """画面内容发生变化（变化触发模式下使用）"""
+        self.dirty = True
+
+    def tick(self):
+        """
+        每帧绘制前调用（在 mark_changed() 之后），决定本帧是否显示
+        :return: 本帧是否显示
+        """
+        elapsed = time.ticks_ms() - self.last_show
+        due = elapsed >= self.period
+        if self.on_change:
+            due = due and (self.dirty or elapsed >= self.KEEPALIVE_MS)
+        self.present = due
+        if not due:
+            self.skipped += 1
+        return due
+
+    def show(self, img):
+        """显示图像（本帧未被调度时不做任何事）"""
+        if not self.present:
+            return False
+        now = time.ticks_ms()
+        self.disp.show(img)
+        self.last_show = now
+        self.dirty = False
+        self.shown += 1
+        if self.preview is not None and now - self.last_preview >= self.preview_period:
+            self.last_preview = now
+            self.preview.send(img)
+        return True
+
+    def stats(self):
+        """返回 (已显示帧数, 跳过帧数)"""
+        return self.shown, self.skipped
+
+
+if __name__ == "__main__":
+    from maix import camera, display, app
+
+    cam = camera.Camera(320, 240)
+    disp = display.Display()
+    scheduler = DisplayScheduler(disp, rate_hz=15, preview=PreviewSender())
+    while not app.need_exit():
+        img = cam.read()
+        blobs = img.find_blobs([[0, 10, -4, 7, -10, 20]], pixels_threshold=50)  # 检测每帧运行
+        if scheduler.tick():
+            for blob in blobs:
+                img.draw_rect(*blob.rect(), image.COLOR_RED, 2)
+            scheduler.show(img)
@@ -1,9 +1,18 @@
 from maix import gpio, pinmap, time
 
-pinmap.set_pin_function("A29", "GPIOA29")
-led = gpio.GPIO("GPIOA29", gpio.Mode.OUT)
-led.value(0)
+LASER_PIN = "A29"
 
-while 1:
-    # led.toggle()
-    time.sleep_ms(500)
\ No newline at end of file
+
+def init_laser(pin=LASER_PIN):
+    """配置激光控制引脚并关闭激光（在需要时调用，导入本模块不会操作硬件）"""
+    pinmap.set_pin_function(pin, "GPIO" + pin)
+    led = gpio.GPIO("GPIO" + pin, gpio.Mode.OUT)
+    led.value(0)
+    return led
+
+
+if __name__ == "__main__":
+    led = init_laser()
+    while 1:
+        # led.toggle()
+        time.sleep_ms(500)
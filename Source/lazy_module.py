@@ -0,0 +1,35 @@
+from time import perf_counter
+import importlib
+import sys
+
+_import_hook = None   # 延迟导入完成时的回调 hook(模块名, 耗时秒)
+
+
+def set_import_hook(hook):
+    """设置延迟导入的计时回调（如启动计时），None 取消"""
+    global _import_hook
+    _import_hook = hook
+
+
+class LazyModule:
+    def __init__(self, name):
+        """
+        延迟导入：首次访问属性时才真正导入模块，之后属性直接从本对象读取
+        用法: cv2 = lazy_import("cv2")
+        """
+        self.__dict__["_name"] = name
+
+    def __getattr__(self, attr):
+        name = self.__dict__["_name"]
+        start = perf_counter()
+        module = importlib.import_module(name)
+        if _import_hook is not None:
+            _import_hook(name, perf_counter() - start)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """已导入时直接返回模块，否则返回延迟导入代理"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,206 @@
+import json
+import os
+import numpy as np
+from lazy_module import lazy_import
+
+cv2 = lazy_import("cv2")
+
+PATTERN = (9, 6)       # 棋盘格内角点数 (列, 行)
+SQUARE_SIZE = 25.0     # 棋盘格方格边长（毫米，只影响外参尺度）
+
+
+def find_chessboard(gray, pattern=PATTERN, fast=False):
+    """
+    检测棋盘格角点（亚像素精化）
+    :param fast: 快速检查模式，用于采集时实时判断
+    :return: (N, 1, 2) float32 角点，未找到返回 None
+    """
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE
+    if fast:
+        flags |= cv2.CALIB_CB_FAST_CHECK
+    found, corners = cv2.findChessboardCorners(gray, pattern, flags=flags)
+    if not found:
+        return None
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+    cv2.cornerSubPix(gray, corners, (5, 5), (-1, -1), criteria)
+    return corners
+
+
+def record_frames(cam, disp, out_dir, count=20, interval_ms=1000, pattern=PATTERN):
+    """
+    设备端采集标定图像：检测到棋盘格且距上次保存超过 interval_ms 时保存一帧
+    :param out_dir: 图像保存目录
+    :param count: 采集张数
+    :return: 保存的文件路径列表
+    """
+    # 设备端依赖只在采集时导入，离线标定（calibrate）与 Undistorter 在PC上只需 cv2 和 numpy
+    from maix import image, time
+    from cv_bridge import CVBridge
+
+    os.makedirs(out_dir, exist_ok=True)
+    bridge = CVBridge.get_instance()
+    paths = []
+    last_save = 0
+    while len(paths) < count:
+        img = cam.read()
+        corners = find_chessboard(bridge.gray(img), pattern, fast=True)
+        now = time.ticks_ms()
+        if corners is not None and now - last_save >= interval_ms:
+            path = os.path.join(out_dir, "calib_%02d.jpg" % len(paths))
+            img.save(path)
+            paths.append(path)
+            last_save = now
+        if corners is not None:
+            for x, y in corners.reshape(-1, 2):
+                img.draw_cross(int(x), int(y), image.COLOR_GREEN, 2, 1)
+        img.draw_string(4, 4, "%d/%d" % (len(paths), count), image.COLOR_RED)
+        disp.show(img)
+    return paths
+
+
+def calibrate(paths, out_path, pattern=PATTERN, square=SQUARE_SIZE):
+    """
+    离线标定：由棋盘格图像估计内参与畸变系数并保存为 JSON
+    :param paths: 标定图像路径列表
+    :param out_path: 标定结果保存路径
+    :return: 重投影误差 RMS（像素）
+    """
+    obj = np.zeros((pattern[0] * pattern[1], 3), np.float32)
+    obj[:, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2) * square
+
+    obj_points, img_points = [], []
+    size = None
+    for path in paths:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            print(f"无法读取: {path}")
+            continue
+        size = (gray.shape[1], gray.shape[0])
+        corners = find_chessboard(gray, pattern)
+        if corners is None:
+            print(f"未检测到棋盘格: {path}")
+            continue
+        obj_points.append(obj)
+        img_points.append(corners)
+
+    if len(img_points) < 3:
+        raise ValueError(f"有效标定图像不足（{len(img_points)} 张），至少需要3张")
+
+    rms, K, dist, _, _ = cv2.calibrateCamera(obj_points, img_points, size, None, None)
+    with open(out_path, "w") as f:
+        json.dump({"size": list(size), "camera_matrix": K.tolist(),
+                   "dist": dist.ravel().tolist(), "rms": rms}, f)
+    print(f"标定完成: {len(img_points)} 张, RMS = {rms:.3f} 像素")
+    return rms
+
+
+class Undistorter:
+    def __init__(self, camera_matrix, dist, size, calib_size=None, cache_path=None):
+        """
+        点去畸变：启动时为每个像素预计算去畸变坐标查找表，运行时只查表，不做整图重映射
+        输出坐标仍为像素单位（新相机矩阵与原内参相同）
+        :param camera_matrix: 3x3 内参矩阵（标定分辨率下）
+        :param dist: 畸变系数 (k1, k2, p1, p2[, k3])
+        :param size: 检测图像分辨率 (w, h)
+        :param calib_size: 标定时的分辨率，与 size 不同时按比例缩放内参
+        :param cache_path: 查找表缓存文件（.npz），尺寸与内参、畸变系数都匹配时直接加载，否则重建并覆盖
+        """
+        self.size = tuple(size)
+        w, h = self.size
+        K = np.array(camera_matrix, dtype=np.float64)
+        if calib_size is not None and tuple(calib_size) != self.size:
+            K[0] *= w / calib_size[0]
+            K[1] *= h / calib_size[1]
+        self.K = K
+        self.dist = np.zeros(5)
+        self.dist[:len(dist)] = np.array(dist, dtype=np.float64)[:5]
+
+        if not (cache_path and self._load_cache(cache_path)):
+            self._build_lut()
+            if cache_path:
+                try:
+                    np.savez(cache_path, map_x=self.map_x, map_y=self.map_y, K=self.K, dist=self.dist)
+                except OSError as e:
+                    print(f"查找表缓存写入失败（不影响使用）: {cache_path}: {e}")
+
+    @classmethod
+    def load(cls, path, size):
+        """由 calibrate() 保存的 JSON 创建，查找表缓存在同目录"""
+        with open(path) as f:
+            calib = json.load(f)
+        cache_path = "%s.%dx%d.npz" % (os.path.splitext(path)[0], size[0], size[1])
+        return cls(calib["camera_matrix"], calib["dist"], size, calib["size"], cache_path)
+
+    def _load_cache(self, cache_path):
+        """加载查找表缓存，缓存不存在、损坏或由其他标定结果生成时返回 False"""
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            cache = np.load(cache_path)
+            if "K" not in cache or "dist" not in cache:
+                return False
+            if cache["map_x"].shape != (self.size[1], self.size[0]):
+                return False
+            if not (np.array_equal(cache["K"], self.K) and np.array_equal(cache["dist"], self.dist)):
+                return False
+            self.map_x, self.map_y = cache["map_x"], cache["map_y"]
+        except (OSError, ValueError, KeyError):
+            return False
+        return True
+
+    def _build_lut(self):
+        """对所有像素一次性批量去畸变"""
+        w, h = self.size
+        xs, ys = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+        pts = np.stack([xs.ravel(), ys.ravel()], axis=1).reshape(-1, 1, 2)
+        und = cv2.undistortPoints(pts, self.K, self.dist, P=self.K).reshape(h, w, 2)
+        self.map_x = np.ascontiguousarray(und[:, :, 0])
+        self.map_y = np.ascontiguousarray(und[:, :, 1])
+
+    def point(self, x, y):
+        """单点去畸变（整数坐标直接查表，小数坐标双线性插值）"""
+        w, h = self.size
+        xi = min(max(int(x), 0), w - 2)
+        yi = min(max(int(y), 0), h - 2)
+        fx, fy = x - xi, y - yi
+        mx, my = self.map_x, self.map_y
+        if fx == 0 and fy == 0:
+            return float(mx[yi, xi]), float(my[yi, xi])
+        w00 = (1 - fx) * (1 - fy)
+        w10 = fx * (1 - fy)
+        w01 = (1 - fx) * fy
+        w11 = fx * fy
+        return (float(w00 * mx[yi, xi] + w10 * mx[yi, xi + 1] + w01 * mx[yi + 1, xi] + w11 * mx[yi + 1, xi + 1]),
+                float(w00 * my[yi, xi] + w10 * my[yi, xi + 1] + w01 * my[yi + 1, xi] + w11 * my[yi + 1, xi + 1]))
+
+    def points(self, pts):
+        """批量去畸变（角点等）"""
+        return [self.point(x, y) for x, y in pts]
+
+    def distort_point(self, x, y):
+        """去畸变坐标 -> 原始图像坐标（解析畸变模型，用于在原图上显示）"""
+        fx, fy, cx, cy = self.K[0, 0], self.K[1, 1], self.K[0, 2], self.K[1, 2]
+        k1, k2, p1, p2, k3 = self.dist
+        u = (x - cx) / fx
+        v = (y - cy) / fy
+        r2 = u * u + v * v
+        radial = 1 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
+        ud = u * radial + 2 * p1 * u * v + p2 * (r2 + 2 * u * u)
+        vd = v * radial + p1 * (r2 + 2 * v * v) + 2 * p2 * u * v
+        return float(ud * fx + cx), float(vd * fy + cy)
+
+
+if __name__ == "__main__":
+    import sys
+    import glob
+
+    if len(sys.argv) > 2 and sys.argv[1] == "calibrate":
+        # 离线标定: python lens_calibration.py calibrate <图像目录> [输出文件]
+        out = sys.argv[3] if len(sys.argv) > 3 else "lens_calibration.json"
+        calibrate(sorted(glob.glob(os.path.join(sys.argv[2], "*.jpg"))), out)
+    else:
+        # 设备端采集标定图像
+        from maix import camera, display
+        cam = camera.Camera(320, 240)
+        disp = display.Display()
+        record_frames(cam, disp, "/root/calib")
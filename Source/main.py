@@ -1,15 +1,56 @@
-from maix import camera, display, image, nn, app, uart, pinmap, time, touchscreen
-from serial_protocol import SerialProtocol
-from blob_detect import BlobDetector
-from threshold import ColorThresholdConfig
-from menu import MenuInterface
-from servo import ServoController
-from pid import PIDIncrementalController
-from black_rect_detector import BlackRectangleDetector
-import struct
+from startup import Startup
+
+# 启动计时：导入逐个计时，设备并行初始化，首次跟踪成功时打印明细
+startup = Startup.get_instance()
+with startup.trace_imports():
+    from maix import camera, display, image, nn, app, uart, pinmap, time, touchscreen
+    from serial_protocol import SerialProtocol
+    from blob_detect import BlobDetector
+    from threshold import ColorThresholdConfig
+    from menu import MenuInterface
+    from servo import ServoController, ServoGroup
+    from pid import PIDIncrementalController
+    from black_rect_detector import BlackRectangleDetector, quad_points
+    from visual_servo import VisualServo
+    from config_store import ConfigStore
+    from adaptive_threshold import AdaptiveThreshold, lock_camera
+    from capture import Capture
+    from lens_calibration import Undistorter
+    from aim_model import AimModel
+    from pipeline import Pipeline
+    from nodes import (CaptureNode, LightNode, BlobNode, RectNode, ControlNode, TuneNode,
+                       OverlayNode, MenuNode, DisplayNode)
+    from overlay import Overlay
+    from display_scheduler import DisplayScheduler, PreviewSender
+    import struct
 
 SCREEN_WIDTH, SCREEN_HEIGHT = 320, 240
 CAMERA_RESOLUTION = (SCREEN_WIDTH, SCREEN_HEIGHT)
+PIPELINE_WORKERS = 2   # 互不依赖的检测节点并行执行的线程数
+REPORT_FRAMES = 300    # 每隔多少帧打印一次节点耗时
+
+CONFIG_PATH = "/root/maixcam_config.json"
+CONFIG_DEFAULTS = {
+    "black_threshold": [[0, 10, -4, 7, -10, 20]],
+    "red_threshold": [[0, 80, 40, 80, 10, 80]],
+    "pid_x": [0.08, 0.035, 0.1],
+    "pid_y": [0.1, 0.03, 0],
+    "servo_180": [],      # 舵机标定点 [(角度, 占空比)]，空为理想映射
+    "servo_270": [],
+    "roi_margin": 10,
+    "adaptive_threshold": True,   # 按全局亮度自动平移阈值的 L 上下界
+    "lock_camera": False,         # 固定曝光与白平衡
+    "detect_resolution": None,    # 检测流分辨率，如 [160, 120]；None 与显示分辨率相同
+    "detect_format": None,        # 检测流格式名称，如 "FMT_GRAYSCALE"；None 与显示流相同
+    "headless": False,            # 无头模式：不绘制叠加层、不刷新屏幕（比赛时使用）
+    "display_hz": 15,             # 屏幕最高刷新率，检测与控制仍每帧运行；0 为不限
+    "display_on_change": False,   # 仅在检测结果变化时刷新屏幕
+    "preview_port": None,         # 缩小预览的本地 UDP 端口，None 不发送
+    "min_rect_confidence": 0.3,   # 矩形置信度低于该值时不用于舵机控制
+    "band_mode": False,           # 黑色边框（胶带）模式：以内外轮廓的中线作为目标四边形
+    "lens_calibration": None,     # 镜头标定文件（lens_calibration.py 生成），控制计算在去畸变坐标中进行
+    "aim_model": None,            # 像素 -> 舵机角度映射（aim_model.py 标定生成），用于前馈瞄准
+}
 
 class DisplayManager:
     _instance = None
@@ -19,25 +60,61 @@ class DisplayManager:
             cls._instance = display.Display()
         return cls._instance
 
-# ports = uart.list_devices()
-# print(ports)
-pinmap.set_pin_function("A16", "UART0_TX")
-pinmap.set_pin_function("A17", "UART0_RX")
-device = "/dev/ttyS0"
-serial = uart.UART(device, 115200)
-data_buffer = bytearray()
-com_proto = SerialProtocol()
+def init_io():
+    """
+    串口与舵机都要设置引脚复用（pinmap），放在同一个任务中串行初始化，
+    不与其他 pinmap / PWM 配置并发执行
+    """
+    # ports = uart.list_devices()
+    # print(ports)
+    pinmap.set_pin_function("A16", "UART0_TX")
+    pinmap.set_pin_function("A17", "UART0_RX")
+    device = "/dev/ttyS0"
+    serial = uart.UART(device, 115200)
+
+    servo_180 = ServoController(180)
+    servo_270 = ServoController(270)
+    if config_store.get("servo_180"):
+        servo_180.set_calibration(config_store.get("servo_180"))
+    if config_store.get("servo_270"):
+        servo_270.set_calibration(config_store.get("servo_270"))
+    return serial, servo_180, servo_270
+
+def init_media():
+    """
+    摄像头、显示屏、触摸屏共用多媒体栈，其并发初始化未在设备上验证过，
+    放在同一个任务中串行初始化（整体仍与 init_io 并行）
+    """
+    # 显示流保持 CAMERA_RESOLUTION，检测可在更低分辨率的检测流上进行
+    capture = Capture(CAMERA_RESOLUTION, config_store.get("detect_resolution"),
+                      config_store.get("detect_format"))
+    # 修改所有display初始化处
+    # disp = display.Display()
+    disp = DisplayManager.get_instance()
+    ts = touchscreen.TouchScreen()
+    return capture, disp, ts
+
+# 启动时加载保存的阈值与标定参数
+config_store = ConfigStore(CONFIG_PATH, CONFIG_DEFAULTS)
 
-cam = camera.Camera(CAMERA_RESOLUTION[0], CAMERA_RESOLUTION[1])
-# 修改所有display初始化处
-# disp = display.Display()
-disp = DisplayManager.get_instance()
+# 互不依赖的设备并行初始化
+startup.start("io", init_io)
+startup.start("media", init_media)
 
-ts = touchscreen.TouchScreen()
+data_buffer = bytearray()
+com_proto = SerialProtocol()
+serial, servo_180, servo_270 = startup.get("io")
+capture, disp, ts = startup.get("media")
+cam = capture.cam
+overlay = Overlay(config_store.get("headless"))
+preview = PreviewSender(port=config_store.get("preview_port")) if config_store.get("preview_port") else None
+screen = DisplayScheduler(disp, config_store.get("display_hz"), config_store.get("display_on_change"), preview)
 menu = MenuInterface(disp, ts, cam)
 
-black_threshold = [[0, 10, -4, 7, -10, 20]]
+black_threshold = config_store.get("black_threshold")
 rect_detector = BlackRectangleDetector(cam, black_threshold)
+rect_detector.roi_margin = config_store.get("roi_margin")
+rect_detector.band_mode = config_store.get("band_mode")
 rect_x, rect_y = 0, 0
 black_flag = False
 
@@ -46,8 +123,57 @@ black_detector = BlobDetector(black_threshold, 50)
 
 start_flag = 0
 servo_flag = False
-servo_180 = ServoController(180)
-servo_270 = ServoController(270)
+servos = ServoGroup([servo_180, servo_270])
+
+red_threshold = config_store.get("red_threshold")
+visual_servo = VisualServo(servos, red_threshold)
+visual_servo.set_gains(config_store.get("pid_x"), config_store.get("pid_y"))
+if config_store.get("lens_calibration"):
+    visual_servo.undistorter = Undistorter.load(config_store.get("lens_calibration"), capture.detect_size)
+
+def set_aim_model(data):
+    visual_servo.aim_model = None
+    if data:
+        try:
+            visual_servo.aim_model = AimModel.from_dict(data, capture.detect_size)
+        except ValueError as e:
+            print(f"不使用前馈瞄准: {e}")
+
+set_aim_model(config_store.get("aim_model"))
+
+if config_store.get("lock_camera"):
+    lock_camera(cam)
+adaptive = AdaptiveThreshold()
+
+def set_black_detectors(threshold):
+    black_detector.set_threshold(threshold)
+    rect_detector.blob_detector.set_threshold(threshold)
+
+# 基准阈值变化（调参 / 配置热加载）时以当前亮度为新基准
+def apply_black_threshold(threshold):
+    global black_threshold
+    black_threshold = threshold
+    if config_store.get("adaptive_threshold"):
+        adaptive.register("black", threshold, set_black_detectors)
+    else:
+        adaptive.unregister("black")   # 关闭自适应时恢复基准阈值
+        set_black_detectors(threshold)
+
+apply_black_threshold(black_threshold)
+
+config_store.watch("black_threshold", apply_black_threshold)
+config_store.watch("adaptive_threshold", lambda enabled: apply_black_threshold(black_threshold))
+config_store.watch("red_threshold", visual_servo.spot_detector.set_threshold)
+config_store.watch("pid_x", lambda gains: visual_servo.set_gains(gains, config_store.get("pid_y")))
+config_store.watch("pid_y", lambda gains: visual_servo.set_gains(config_store.get("pid_x"), gains))
+config_store.watch("servo_180", servo_180.set_calibration)
+config_store.watch("servo_270", servo_270.set_calibration)
+config_store.watch("roi_margin", lambda margin: setattr(rect_detector, "roi_margin", margin))
+config_store.watch("aim_model", set_aim_model)
+config_store.watch("band_mode", lambda band: setattr(rect_detector, "band_mode", band))
+config_store.watch("headless", overlay.set_headless)
+config_store.watch("display_hz", screen.set_rate)
+config_store.watch("display_on_change", screen.set_on_change)
 ctrl_angle_180 = 90
 ctrl_angle_270 = 135
 
@@ -58,76 +184,118 @@ ctrl_angle_270 = 135
 # pid_y.limit(90)
 # pid_y.set_point(CAMERA_RESOLUTION[1] // 2)
 
-while not app.need_exit():
-    img = cam.read()
-    black_result = black_detector.detect_max_blob(img)
+# === 流水线 ===
+# 通用节点见 nodes.py，这里只提供本版本的绘制内容与菜单响应
+# 检测全部在原始检测图像上完成，绘制节点依赖检测结果，保证先检测后绘制
+
+def draw_marks(overlay, black_result, rect_result, servo_on, tuning):
+    """记录检测标记（检测坐标映射到显示坐标）"""
     if black_result is not None:
         if black_result[0]:
-            black_x, black_y = black_result[0]
-            img.draw_cross(black_x, black_y, image.COLOR_BLACK, 5, 2)
+            black_x, black_y = capture.map_point(*black_result[0])
+            overlay.draw_cross(black_x, black_y, image.COLOR_BLACK, 5, 2)
         max_blob = black_result[2]
         if max_blob:
-            x, y, w, h = max_blob.rect()
+            x, y, w, h = capture.map_rect(*max_blob.rect())
             # 绘制矩形（左上角x, 左上角y, 右下角x, 右下角y, 颜色, 线宽）
-            img.draw_rect(x, y, w, h, image.COLOR_RED, 2)
-        
+            overlay.draw_rect(x, y, w, h, image.COLOR_RED, 2)
 
     # 获取矩形中心点
-    rect_result = rect_detector.process_frame()
     if rect_result is not None:
-        corners, center = rect_result
+        corners, center, confidence = rect_result
         if corners and len(corners) == 4:
-    # 按顺序连接4个点，最后一个点连接回第一个点
-            for i in range(4):
-                x1, y1 = corners[i]
-                x2, y2 = corners[(i+1) % 4]  # 取模运算实现循环连接
-                img.draw_line(x1, y1, x2, y2, color=image.COLOR_BLUE, thickness=2)
+            corners = capture.map_points(corners)
+            center = capture.map_point(*center)
+            # 按顺序连接4个点，最后一个点连接回第一个点
+            overlay.draw_polyline(corners, image.COLOR_BLUE, 2, closed=True)
+            if rect_detector.band_mode:
+                # 边框内外轮廓（细线），中线为上面的蓝色四边形
+                for quad in (rect_detector.outer, rect_detector.inner):
+                    overlay.draw_polyline(capture.map_points(quad_points(quad)), image.COLOR_WHITE, 1, closed=True)
             # 绘制十字交叉
-            img.draw_cross(center[0], center[1], image.COLOR_GREEN, 5, 2)
+            overlay.draw_cross(center[0], center[1], image.COLOR_GREEN, 5, 2)
+            overlay.draw_string(center[0] + 6, center[1] + 6, "%.2f" % confidence, image.COLOR_GREEN)
+
+    if servo_on:
+        visual_servo.draw(overlay, capture.map_point)
 
-    # if servo_flag:
-    #     pid_x.update(blue_x)
-    #     ctrl_angle_270 = ctrl_angle_270 - pid_x.output
-    #     pid_y.update(blue_y)
-    #     ctrl_angle_180 = ctrl_angle_180 - pid_y.output
+def screen_marks(black_result, rect_result, servo_on, tuning):
+    """画面标记：检测位置变化时刷新；舵机运行或调参时每帧都视为变化"""
+    if servo_on or tuning:
+        return pipeline.frames
+    return (black_result[0] if black_result is not None else None,
+            rect_result[1] if rect_result is not None else None)
 
-    #     servo_180.set_angle(ctrl_angle_180)
-    #     servo_270.set_angle(ctrl_angle_270)
-    #     print(blue_x, blue_y, ctrl_angle_270, ctrl_angle_180)
+def finish_tuning():
+    config_store.set("black_threshold", black_threshold)  # 保存调好的阈值
 
-    menu.render(img)
-    menu.update()
-    black_flag, start_flag = menu.get_flags()
+def on_menu(black_flag, start_flag):
+    global servo_flag
     if black_flag:
-        config = ColorThresholdConfig(cam, disp, ts, black_threshold) # 运行阈值调整
-        black_threshold = config.run_threshold_adjust()
-        black_detector.set_threshold(black_threshold)
+        tuner.start(ColorThresholdConfig(cam, disp, ts, black_threshold)) # 进入调参叠加层
     if start_flag:
         servo_flag = True
-        
-
-    # # SEND
-    # payload = struct.pack('<iiii', red_x, red_y, blue_x, blue_y)
-    # encoded = com_proto.encode(payload)
-    # serial.write(encoded)
-    # print(red_x,red_y,blue_x,blue_y)
-        
-    # # RECV
-    # length = serial.available()
-    # if length > 0:
-    #     data = serial.read(length)
-    #     data_buffer += data
-    #     rc, bytes_redundant = com_proto.is_valid(data_buffer)
-    #     if bytes_redundant > 0:
-    #         data_buffer = data_buffer[bytes_redundant:]
-    #     if rc >= 0:
-    #         result = com_proto.decode(data_buffer)
-    #         if len(result) == 16:
-    #             x0,y0,x1,y1 = struct.unpack('<iiii', result)
-    #             print('{},{},{},{}'.format(x0,y0,x1,y1))
-
-    #     packet_length = com_proto.length(data_buffer)
-    #     data_buffer = data_buffer[packet_length:]
-
-    
-    disp.show(img)
\ No newline at end of file
+
+tuner = TuneNode(apply_black_threshold, finish_tuning)
+
+pipeline = Pipeline(workers=PIPELINE_WORKERS)
+# img 用于显示，det_img 用于检测（两者分辨率可以不同）
+pipeline.add("capture", CaptureNode(capture, config_store.poll), outputs=("img", "det_img"))
+# 光照变化时平移阈值，检测节点在其后执行
+pipeline.add("light", LightNode(adaptive, lambda: config_store.get("adaptive_threshold")),
+             inputs=("det_img",), outputs=("light",))
+pipeline.add("blob", BlobNode(black_detector), inputs=("det_img",), outputs=("black_result",), after=("light",))
+pipeline.add("rect", RectNode(rect_detector), inputs=("det_img",), outputs=("rect_result",), after=("light",))
+# 激光点与矩形角点同帧闭环（全部在检测坐标系中计算）
+pipeline.add("control", ControlNode(visual_servo, lambda: servo_flag, lambda: config_store.get("min_rect_confidence")),
+             inputs=("det_img", "rect_result"), outputs=("servo_on",))
+# 调参会替换检测器阈值，放在本帧检测与控制之后
+pipeline.add("tune", tuner, inputs=("img",), outputs=("tuning",), after=("blob", "rect", "control"))
+pipeline.add("overlay", OverlayNode(overlay, draw_marks, screen, screen_marks),
+             inputs=("img", "black_result", "rect_result", "servo_on", "tuning"), outputs=("canvas",))
+pipeline.add("menu", MenuNode(menu, on_menu, screen, overlay), inputs=("canvas", "tuning"), outputs=("menu_done",))
+pipeline.add("display", DisplayNode(screen, overlay), inputs=("canvas",), sink=True, after=("menu",))
+
+startup.mark("ready")
+boot_reported = False
+while not app.need_exit():
+    pipeline.run_once()
+    if not boot_reported:
+        startup.mark("first_frame")
+        if pipeline.values.get("rect_result") is not None:
+            startup.mark("first_tracked")
+            print(startup.report())
+            startup.close()
+            boot_reported = True
+    if pipeline.frames % REPORT_FRAMES == 0:
+        print(pipeline.report())
+        print("display: shown %d, skipped %d" % screen.stats())
+        print("rect: accepted %d, rejected %s" % rect_detector.stats())
+        if overlay.headless:
+            print("headless: dropped %d, skipped %d, saved %.1f ms" % overlay.stats())
+
+# 串口收发（需要时可用 nodes.SerialNode 作为串口节点加入流水线）
+# # SEND
+# payload = struct.pack('<iiii', red_x, red_y, blue_x, blue_y)
+# encoded = com_proto.encode(payload)
+# serial.write(encoded)
+# print(red_x,red_y,blue_x,blue_y)
+
+# # RECV
+# length = serial.available()
+# if length > 0:
+#     data = serial.read(length)
+#     data_buffer += data
+#     rc, bytes_redundant = com_proto.is_valid(data_buffer)
+#     if bytes_redundant > 0:
+#         data_buffer = data_buffer[bytes_redundant:]
+#     if rc >= 0:
+#         result = com_proto.decode(data_buffer)
+#         if len(result) == 16:
+#             x0,y0,x1,y1 = struct.unpack('<iiii', result)
+#             print('{},{},{},{}'.format(x0,y0,x1,y1))
+
+#     packet_length = com_proto.length(data_buffer)
+#     data_buffer = data_buffer[packet_length:]
+
+pipeline.close()
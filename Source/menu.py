@@ -1,10 +1,13 @@
 from maix import touchscreen, display, image, camera
+from ui_compositor import UICompositor
+from touch_input import TouchInput, HitGrid, TOUCH_PRESS
 
 class MenuInterface:
     def __init__(self, disp, ts, cam):
         # 初始化硬件设备
         self.ts = ts
         self.disp = disp
+        self.touch = TouchInput.get_instance(ts)  # 后台轮询的触摸事件源
         
         # 状态标志
         # self.red_flag = False
@@ -16,6 +19,7 @@ class MenuInterface:
         self.cam = cam
         self.img = image.Image(320, 240)  # 使用空白缓冲区初始化
         self.img.draw_rect(0, 0, self.img.width(), self.img.height(), image.COLOR_WHITE)
+        self.ui = UICompositor()  # 叠加到摄像头画面上的缓存UI图层
         # self.red_btn_pos = None
         # self.blue_btn_pos = None
         self.black_btn_pos = None
@@ -45,6 +49,11 @@ class MenuInterface:
         self.black_btn_pos = [0, 12*2 + start_size.height(), 8*2 + black_size.width(), 12*2 + black_size.height()]
         self.img.draw_string(8, 12*3 + start_size.height(), black_label, image.COLOR_WHITE)
         self.img.draw_rect(*self.black_btn_pos, image.COLOR_WHITE, 2)
+
+        # 预渲染叠加图层（按钮只渲染一次，文字相对按钮偏移 (8, 12)）
+        self.ui.add_rect(0, 0, self.img.width(), self.img.height(), image.COLOR_WHITE)
+        self.ui.add_button("start", *self.start_btn_pos, start_label, 8, 12)
+        self.ui.add_button("black", *self.black_btn_pos, black_label, 8, 12)
         
         # # 绘制红色按钮
         # red_label = "R"
@@ -75,6 +84,10 @@ class MenuInterface:
             self.disp.width(), self.disp.height(),
             image.Fit.FIT_CONTAIN, *self.black_btn_pos
         )
+        # 按屏幕坐标建立命中测试网格（布局不变，只构建一次）
+        self.hit_grid = HitGrid(self.disp.width(), self.disp.height())
+        self.hit_grid.add("start", self.start_btn_disp_pos)
+        self.hit_grid.add("black", self.black_btn_disp_pos)
         # self.red_btn_disp_pos = image.resize_map_pos(
         #     self.img.width(), self.img.height(),
         #     self.disp.width(), self.disp.height(),
@@ -92,30 +105,24 @@ class MenuInterface:
                 y > btn_pos[1] and y < btn_pos[1] + btn_pos[3])
 
     def update(self):
-        # 处理触摸输入并更新状态
-        x, y, pressed = self.ts.read()
-        if pressed:
-            # self.red_flag = self.is_in_button(x, y, self.red_btn_disp_pos)
-            # self.blue_flag = self.is_in_button(x, y, self.blue_btn_disp_pos)
-            self.black_flag = self.is_in_button(x, y, self.black_btn_disp_pos)
-            self.start_flag = self.is_in_button(x, y, self.start_btn_disp_pos)
+        # 处理触摸事件并更新状态（标志只在按下的那一帧有效）
+        self.black_flag = False
+        self.start_flag = False
+        for event, x, y, _ in self.touch.get_events():
+            if event != TOUCH_PRESS:
+                continue
+            hit = self.hit_grid.hit(x, y)
+            # self.red_flag = hit == "red"
+            # self.blue_flag = hit == "blue"
+            self.black_flag = hit == "black"
+            self.start_flag = hit == "start"
         return self.black_flag, self.start_flag
 
     def render(self, background_img=None):
         
         if background_img:
-            background_img.draw_rect(0, 0, background_img.width(), background_img.height(), image.COLOR_WHITE)
-
-            start_label = "S"
-            start_size = image.string_size(start_label)
-            background_img.draw_string(8, 12, start_label, image.COLOR_WHITE)
-            background_img.draw_rect(*self.start_btn_pos, image.COLOR_WHITE, 2)
-
-            # 绘制黑色按钮
-            black_label = "B"
-            black_size = image.string_size(black_label)
-            background_img.draw_string(8, 12*3 + start_size.height(), black_label, image.COLOR_WHITE)
-            background_img.draw_rect(*self.black_btn_pos, image.COLOR_WHITE, 2)
+            # 贴上预渲染的按钮图层，不再逐帧绘制文字和计算文本尺寸
+            self.ui.compose(background_img)
 
             
             # # 绘制蓝色按钮
@@ -0,0 +1,275 @@
+from maix import time
+
+# 通用流水线节点：节点所需的检测器、舵机、显示等对象全部由构造参数传入，
+# 不读取任何脚本的全局变量，各个比赛版本的主程序只负责组装
+
+
+class CaptureNode:
+    def __init__(self, source, before=None):
+        """
+        采集节点
+        :param source: 带 read() 的采集对象（Capture 输出 (显示图像, 检测图像)，camera.Camera 输出单帧）
+        :param before: 每帧读取前调用的函数（如配置热加载），None 不调用
+        读取失败（返回 None）时重新读取，下游节点总能拿到有效图像
+        """
+        self.source = source
+        self.before = before
+
+    def __call__(self):
+        if self.before is not None:
+            self.before()
+        frame = self.source.read()
+        while frame is None:
+            frame = self.source.read()
+        return frame
+
+
+class ClockNode:
+    def __init__(self):
+        """帧间隔节点：输出距上一帧的时间（秒）"""
+        self.last = time.ticks_ms()
+
+    def __call__(self):
+        now = time.ticks_ms()
+        dt = (now - self.last) / 1000.0
+        self.last = now
+        return dt
+
+
+class LightNode:
+    def __init__(self, adaptive, enabled=None):
+        """
+        光照补偿节点：更新全局亮度并平移已登记的阈值（检测节点应声明 after 本节点）
+        :param adaptive: AdaptiveThreshold
+        :param enabled: 返回是否启用的函数，None 为始终启用
+        """
+        self.adaptive = adaptive
+        self.enabled = enabled
+
+    def __call__(self, img):
+        if self.enabled is not None and not self.enabled():
+            return None
+        return self.adaptive.update(img)
+
+
+class BlobNode:
+    def __init__(self, detector):
+        """
+        色块检测节点
+        :param detector: BlobDetector
+        :return: detect_max_blob() 的结果 (中心点, 滤波后中心点, 色块)
+        """
+        self.detector = detector
+
+    def __call__(self, img):
+        return self.detector.detect_max_blob(img)
+
+
+class RectNode:
+    def __init__(self, detector):
+        """
+        矩形检测节点
+        :param detector: 带 process_frame(img) 的矩形检测器
+        """
+        self.detector = detector
+
+    def __call__(self, img):
+        return self.detector.process_frame(img)
+
+
+class CascadeNode:
+    def __init__(self, cascade, stage):
+        """
+        ROI级联中某一级的检测节点（级联按帧缓存，同一帧内各级共享结果）
+        :param cascade: ROICascade
+        :param stage: 级别名称
+        """
+        self.cascade = cascade
+        self.stage = stage
+
+    def __call__(self, img):
+        return self.cascade.run(img, self.stage)
+
+
+class TrackNode:
+    def __init__(self, detect, tracker, coasting=True):
+        """
+        多目标跟踪节点
+        :param detect: detect(img) -> [(x, y, w, h)] 本帧检测结果
+        :param tracker: MultiTargetTracker
+        :param coasting: 输出是否包含本帧未匹配、仍在保持的轨迹
+        :return: 已确认的轨迹列表
+        """
+        self.detect = detect
+        self.tracker = tracker
+        self.coasting = coasting
+
+    def __call__(self, img):
+        self.tracker.update(self.detect(img))
+        return self.tracker.confirmed(coasting=self.coasting)
+
+
+class ControlNode:
+    def __init__(self, servo, active, min_confidence=None):
+        """
+        视觉伺服控制节点：激光点与矩形角点同帧闭环
+        :param servo: VisualServo
+        :param active: 返回是否启用闭环的函数（如菜单开始按钮）
+        :param min_confidence: 返回最低矩形置信度的函数，None 不检查
+        :return: 本帧是否执行了控制
+        """
+        self.servo = servo
+        self.active = active
+        self.min_confidence = min_confidence
+
+    def __call__(self, img, rect_result):
+        if not self.active():
+            return False
+        corners = None
+        if rect_result is not None:
+            if self.min_confidence is None or rect_result[2] >= self.min_confidence():
+                corners = rect_result[0]
+        self.servo.update(img, corners)
+        return True
+
+
+class SerialNode:
+    def __init__(self, read, pending=None):
+        """
+        串口接收节点
+        :param read: read() -> 一条完整指令或数据包，无数据返回 None
+        :param pending: 返回串口是否有数据的函数，None 时每帧都调用 read
+        :return: 本帧收到的指令，无则为 None
+        """
+        self.read = read
+        self.pending = pending
+
+    def __call__(self):
+        if self.pending is not None and not self.pending():
+            return None
+        return self.read()
+
+
+class ModeNode:
+    def __init__(self, modes, commands=None, actions=None):
+        """
+        模式节点：按指令切换状态机模式，再执行当前模式的每帧工作
+        :param modes: StateMachine
+        :param commands: {指令: 模式名称}
+        :param actions: {指令: 函数} 不切换模式、只执行一次的指令（如保存标定点）
+        :return: 当前模式名称
+        """
+        self.modes = modes
+        self.commands = commands or {}
+        self.actions = actions or {}
+
+    def __call__(self, cmd, *args):
+        if cmd in self.actions:
+            self.actions[cmd]()
+        elif cmd in self.commands:
+            self.modes.transition(self.commands[cmd], reason=cmd)
+        self.modes.step(*args)
+        return self.modes.mode
+
+
+class TuneNode:
+    def __init__(self, apply, finish=None):
+        """
+        非模态调参节点：调参叠加层逐帧运行，检测与控制照常进行
+        :param apply: apply(阈值) 阈值变化时调用
+        :param finish: finish() 调参结束时调用（如保存配置），None 不调用
+        :return: 本帧是否处于调参状态
+        """
+        self.apply = apply
+        self.finish = finish
+        self.session = None
+
+    def start(self, session):
+        """开始调参，session 为 ColorThresholdConfig"""
+        self.session = session
+
+    def __call__(self, img):
+        if self.session is None:
+            return False
+        if self.session.step(img):
+            self.apply(self.session.get_threshold())
+        if self.session.finished():
+            self.session = None
+            if self.finish is not None:
+                self.finish()
+        return True
+
+
+class OverlayNode:
+    def __init__(self, overlay, draw, screen=None, marks=None):
+        """
+        叠加层节点：记录本帧绘制指令并统一绘制到显示图像
+        :param overlay: Overlay 指令缓冲
+        :param draw: draw(overlay, *结果) 记录绘制指令，结果为本节点除图像外的输入
+        :param screen: DisplayScheduler，None 时每帧都绘制
+        :param marks: marks(*结果) -> 本帧画面标记，与上一帧不同时通知 screen 画面变化；None 时每帧都视为变化
+        :return: 绘制后的图像
+        """
+        self.overlay = overlay
+        self.draw = draw
+        self.screen = screen
+        self.marks = marks
+        self.last_marks = None
+
+    def __call__(self, img, *results):
+        if self.screen is not None:
+            # 先标记变化再决定本帧是否刷新，不刷新时跳过全部绘制
+            marks = self.marks(*results) if self.marks is not None else None
+            if self.marks is None or marks != self.last_marks:
+                self.screen.mark_changed()
+            self.last_marks = marks
+            if not self.screen.tick():
+                return img
+        self.draw(self.overlay, *results)
+        self.overlay.flush(img)
+        return img
+
+
+class MenuNode:
+    def __init__(self, menu, on_flags, screen=None, overlay=None):
+        """
+        触摸菜单节点
+        :param menu: MenuInterface
+        :param on_flags: on_flags(*按钮标志) 每帧以 menu.get_flags() 的结果调用
+        :param screen: DisplayScheduler，本帧不刷新时不绘制菜单；None 每帧绘制
+        :param overlay: Overlay，无头模式下不绘制菜单；None 不检查
+        """
+        self.menu = menu
+        self.on_flags = on_flags
+        self.screen = screen
+        self.overlay = overlay
+
+    def __call__(self, canvas, busy=False):
+        """busy 为真时（如调参中）本帧不处理菜单"""
+        if busy:
+            return False
+        present = self.screen is None or self.screen.present
+        if present and (self.overlay is None or not self.overlay.headless):
+            self.menu.render(canvas)
+        self.menu.update()
+        self.on_flags(*self.menu.get_flags())
+        return True
+
+
+class DisplayNode:
+    def __init__(self, disp, overlay=None):
+        """
+        显示节点（终端节点）
+        :param disp: 显示设备或 DisplayScheduler（本帧未调度时不显示）
+        :param overlay: Overlay，无头模式下跳过显示；None 直接显示
+        """
+        self.disp = disp
+        self.overlay = overlay
+
+    def __call__(self, canvas):
+        if getattr(self.disp, "present", True) is False:
+            return   # DisplayScheduler 本帧未调度
+        if self.overlay is not None:
+            self.overlay.show(self.disp, canvas)
+        else:
+            self.disp.show(canvas)
@@ -1,6 +1,8 @@
 from maix import image, display, app, camera
-import cv2
-import numpy as np
+from cv_bridge import CVBridge
+from lazy_module import lazy_import
+
+cv2 = lazy_import("cv2")
 
 class RectangleDetector:
     def __init__(self, width=320, height=240, canny_threshold1=100, canny_threshold2=200):
@@ -10,6 +12,7 @@ class RectangleDetector:
         # 边缘检测参数
         self.canny_threshold1 = canny_threshold1
         self.canny_threshold2 = canny_threshold2
+        self.bridge = CVBridge.get_instance()
         # 存储检测结果
         self.rect_centers = []
 
@@ -19,12 +22,13 @@ class RectangleDetector:
         if img is None:
             return None
 
-        # 转换为OpenCV格式
-        img_cv = image.image2cv(img, ensure_bgr=False, copy=False)
+        # 转换为OpenCV格式（共享内存的视图）
+        img_cv = self.bridge.view(img)
 
-        # 转为灰度图并进行边缘检测
-        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, self.canny_threshold1, self.canny_threshold2)
+        # 转为灰度图并进行边缘检测（结果写入预分配缓冲区）
+        gray = self.bridge.gray(img)
+        edges = self.bridge.scratch("edges", gray.shape)
+        cv2.Canny(gray, self.canny_threshold1, self.canny_threshold2, edges=edges)
 
         # 查找轮廓
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -1,4 +1,6 @@
 from maix import pwm, time, pinmap, app
+from array import array
+import json
 
 class ServoController:
     # 舵机PWM参数（类级常量）
@@ -9,13 +11,16 @@ class ServoController:
     ANGLE_270_RANGE = 270      # 默认角度范围（0-180度）
     SERVO_180_LIMIT = (10.0, 180.0)
     SERVO_270_LIMIT = (60.0, 210.0)
+    LUT_RESOLUTION = 0.1   # 查找表角度分辨率（度）
 
-    def __init__(self, max_angle):
+    def __init__(self, max_angle, calib_file=None, resolution=LUT_RESOLUTION):
         """
         初始化舵机控制器
         :param pwm_id: PWM通道ID
         :param pin_name: 舵机连接引脚
         :param max_angle: 最大可控角度
+        :param calib_file: 舵机标定文件路径（每个物理舵机一份），None 时使用理想映射
+        :param resolution: 查找表角度分辨率（度）
         """
         if max_angle == 180:
             self.pwm_id = 7
@@ -28,7 +33,18 @@ class ServoController:
         
         self.min_angle = 0
         self.max_angle = max_angle
-        
+
+        # 标定点与占空比查找表
+        self.resolution = resolution
+        self.calib_points = []      # [(实测角度, 占空比), ...]
+        self.calibrating = False
+        self._lut = None
+        self._lut_scale = 1.0 / resolution
+        if calib_file:
+            self.load_calibration(calib_file)
+        else:
+            self.build_lut()
+        self.current_duty = self._lookup_duty(self.current_angle)
         
         # 配置引脚功能
         pinmap.set_pin_function(self.pin_name, f"PWM{self.pwm_id}")
@@ -37,7 +53,7 @@ class ServoController:
         self.pwm = pwm.PWM(
             self.pwm_id,
             freq=self.SERVO_PERIOD,
-            duty=self._angle_to_duty(self.current_angle),
+            duty=self.current_duty,
             enable=True
         )
 
@@ -48,25 +64,198 @@ class ServoController:
         # 百分比转换为占空比
         return (self.SERVO_MAX_DUTY - self.SERVO_MIN_DUTY) * percent / 100.0 + self.SERVO_MIN_DUTY
 
+    def build_lut(self, points=None):
+        """
+        由标定点构建单调插值查找表
+        :param points: [(角度, 占空比), ...]，None 时使用理想 0.5~2.5ms 两点映射
+        """
+        if not points:
+            points = [(self.min_angle, self._angle_to_duty(self.min_angle)),
+                      (self.max_angle, self._angle_to_duty(self.max_angle))]
+
+        # 按角度排序，同一角度的多次测量取平均
+        merged = {}
+        for angle, duty in points:
+            merged.setdefault(float(angle), []).append(float(duty))
+        pts = sorted((a, sum(d) / len(d)) for a, d in merged.items())
+        if len(pts) < 2:
+            raise ValueError("标定点至少需要2个不同角度")
+
+        # 强制单调：方向以首尾点为准，逆向的测量点钳位到前一个值
+        increasing = pts[-1][1] >= pts[0][1]
+        mono = [pts[0]]
+        for angle, duty in pts[1:]:
+            last = mono[-1][1]
+            if (increasing and duty < last) or (not increasing and duty > last):
+                duty = last
+            mono.append((angle, duty))
+
+        # 按分辨率分段线性插值，超出标定范围的部分按端段斜率外推
+        size = int(round((self.max_angle - self.min_angle) * self._lut_scale)) + 1
+        lut = array('f', bytes(4 * size))
+        seg = 0
+        for i in range(size):
+            angle = self.min_angle + i * self.resolution
+            while seg < len(mono) - 2 and angle > mono[seg + 1][0]:
+                seg += 1
+            a0, d0 = mono[seg]
+            a1, d1 = mono[seg + 1]
+            lut[i] = d0 + (d1 - d0) * (angle - a0) / (a1 - a0)
+        self._lut = lut
+
+    def _lookup_duty(self, angle):
+        """查表获取占空比"""
+        index = int((angle - self.min_angle) * self._lut_scale + 0.5)
+        if index < 0:
+            index = 0
+        elif index >= len(self._lut):
+            index = len(self._lut) - 1
+        return self._lut[index]
+
+    def start_calibration(self):
+        """进入标定模式，清空已记录的标定点"""
+        self.calibrating = True
+        self.calib_points = []
+
+    def set_duty(self, duty):
+        """直接输出占空比（标定模式下使用）"""
+        self.pwm.duty(duty)
+        self.current_duty = duty
+
+    def record_point(self, measured_angle, duty=None):
+        """
+        记录一个标定点
+        :param measured_angle: 实测舵机角度（度）
+        :param duty: 对应占空比，None 时使用当前输出的占空比
+        """
+        if not self.calibrating:
+            raise RuntimeError("未处于标定模式，请先调用 start_calibration()")
+        if duty is None:
+            duty = self.current_duty
+        self.calib_points.append((float(measured_angle), float(duty)))
+
+    def finish_calibration(self):
+        """退出标定模式，用记录的标定点重建查找表"""
+        self.build_lut(self.calib_points)
+        self.calibrating = False
+
+    def save_calibration(self, path):
+        """保存标定点（查找表在加载时按当前分辨率重建）"""
+        with open(path, "w") as f:
+            json.dump({"max_angle": self.max_angle, "points": self.calib_points}, f)
+
+    def load_calibration(self, path):
+        """加载标定点并重建查找表"""
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("max_angle", self.max_angle) != self.max_angle:
+            raise ValueError("标定文件与舵机角度范围不匹配")
+        self.set_calibration(data["points"])
+
+    def set_calibration(self, points):
+        """直接设置标定点并重建查找表（空列表恢复理想映射）"""
+        self.calib_points = [tuple(p) for p in points]
+        self.build_lut(self.calib_points)
+
+    def clamp_angle(self, angle):
+        """按舵机类型限幅角度"""
+        if self.max_angle == 270 :
+            return max(self.SERVO_270_LIMIT[0], min(angle, self.SERVO_270_LIMIT[1])) 
+        return max(self.SERVO_180_LIMIT[0], min(angle, self.SERVO_180_LIMIT[1]))
+
     def set_angle(self, angle):
         """
         设置舵机角度
         :param angle: 目标角度（度）
         """
         # 角度限幅
-        if self.max_angle == 270 :
-            target_angle = max(self.SERVO_270_LIMIT[0], min(angle, self.SERVO_270_LIMIT[1])) 
-        else:
-            target_angle = max(self.SERVO_180_LIMIT[0], min(angle, self.SERVO_180_LIMIT[1]))
+        target_angle = self.clamp_angle(angle)
 
-        # 设置最终角度
-        self.pwm.duty(self._angle_to_duty(target_angle))
+        # 设置最终角度（查表）
+        duty = self._lookup_duty(target_angle)
+        self.pwm.duty(duty)
+        self.current_duty = duty
         self.current_angle = target_angle
 
     def stop(self):
         """停止舵机PWM输出"""
         self.pwm.enable(False)
 
+
+class ServoGroup:
+    DUTY_QUANTUM = 0.01    # PWM占空比量化步长（%），量化后相同则不写硬件
+
+    def __init__(self, servos, duty_quantum=DUTY_QUANTUM):
+        """
+        多轴舵机组，合并各通道指令并去除重复的PWM写入
+        :param servos: ServoController 列表，顺序即指令向量的顺序
+        :param duty_quantum: 占空比量化步长（%）
+        """
+        self.servos = list(servos)
+        self.duty_quantum = duty_quantum
+        self._last_duty = [None] * len(self.servos)  # 首次指令必定写入
+
+        # 统计计数
+        self.commands = 0          # 收到的通道指令数
+        self.writes = 0            # 实际硬件写入数
+        self.skipped_duty = 0      # 量化后占空比未变丢弃数
+        self._rate_time = time.ticks_ms()
+        self._rate_commands = 0
+        self._rate_writes = 0
+
+    def set_angles(self, angles):
+        """
+        按向量设置各通道角度，只写入占空比发生变化的通道
+        指令角度总是记入 current_angle，小于量化步长的增量指令可以逐次累积
+        :param angles: 目标角度序列，None 表示该通道保持不变
+        :return: 本次实际写入的通道数
+        """
+        written = 0
+        for i, angle in enumerate(angles):
+            if angle is None:
+                continue
+            self.commands += 1
+            servo = self.servos[i]
+            target_angle = servo.clamp_angle(angle)
+            servo.current_angle = target_angle
+
+            # 量化到PWM步长，与上次写入相同则跳过
+            duty = round(servo._lookup_duty(target_angle) / self.duty_quantum) * self.duty_quantum
+            if duty == self._last_duty[i]:
+                self.skipped_duty += 1
+                continue
+
+            servo.set_duty(duty)
+            self._last_duty[i] = duty
+            self.writes += 1
+            written += 1
+        return written
+
+    def get_angles(self):
+        """获取各通道当前角度"""
+        return [servo.current_angle for servo in self.servos]
+
+    def get_stats(self):
+        """
+        获取自上次调用以来的写入统计
+        :return: (每秒指令数, 每秒写入数, 每秒节省的写入数)
+        """
+        now = time.ticks_ms()
+        elapsed = (now - self._rate_time) / 1000.0
+        commands = self.commands - self._rate_commands
+        writes = self.writes - self._rate_writes
+        self._rate_time = now
+        self._rate_commands = self.commands
+        self._rate_writes = self.writes
+        if elapsed <= 0:
+            return 0.0, 0.0, 0.0
+        return commands / elapsed, writes / elapsed, (commands - writes) / elapsed
+
+    def stop(self):
+        """停止所有舵机PWM输出"""
+        for servo in self.servos:
+            servo.stop()
+
 # 使用示例
 if __name__ == "__main__":
     # 创建舵机控制器实例（默认0-180度）
@@ -78,6 +267,14 @@ if __name__ == "__main__":
 
     servo.set_angle(135)  # 2秒内转到180度
 
+    # 标定示例：逐个输出占空比，用量角器读出实际角度后记录
+    # servo.start_calibration()
+    # for duty in (3.0, 5.0, 7.5, 10.0, 12.0):
+    #     servo.set_duty(duty)
+    #     servo.record_point(float(input(f"duty={duty} 实测角度: ")))
+    # servo.finish_calibration()
+    # servo.save_calibration("/root/servo_270.json")
+
     # 清理资源
     # servo.stop()
 
@@ -0,0 +1,98 @@
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from lazy_module import set_import_hook
+import builtins
+import sys
+
+_BOOT = perf_counter()   # 本模块被导入的时刻，作为启动计时起点
+
+
+class _ImportTracer:
+    def __init__(self, startup):
+        self.startup = startup
+        self.depth = 0
+        self.original = None
+
+    def __enter__(self):
+        self.original = builtins.__import__
+
+        def traced(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return self.original(name, globals, locals, fromlist, level)
+            self.depth += 1
+            start = perf_counter()
+            try:
+                return self.original(name, globals, locals, fromlist, level)
+            finally:
+                self.depth -= 1
+                if self.depth == 0:   # 只记录顶层导入（包含其内部依赖的耗时）
+                    self.startup.record("import " + name, perf_counter() - start)
+
+        builtins.__import__ = traced
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self.original
+        return False
+
+
+class Startup:
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, workers=4):
+        """
+        启动编排：
+        - trace_imports(): 统计各模块导入耗时
+        - start()/get(): 互不依赖的设备并行初始化
+        - mark(): 记录关键时间点（首帧、首次跟踪成功等）
+        - report(): 打印导入 / 初始化 / 时间点耗时明细
+        :param workers: 并行初始化线程数
+        """
+        self.pool = ThreadPoolExecutor(workers)
+        self.futures = {}     # {名称: Future}
+        self.timings = []     # [(名称, 秒)]
+        self.marks = []       # [(名称, 距启动的秒数)]
+        # 检测器模块中 lazy_import 的模块在首次使用时计时
+        set_import_hook(lambda name, seconds: self.record("import " + name + " (lazy)", seconds))
+
+    def record(self, name, seconds):
+        self.timings.append((name, seconds))
+
+    def trace_imports(self):
+        """with startup.trace_imports(): 块内的首次导入逐个计时"""
+        return _ImportTracer(self)
+
+    def start(self, name, func, *args):
+        """在后台线程中初始化设备，立即返回"""
+        def run():
+            start = perf_counter()
+            result = func(*args)
+            self.record("init " + name, perf_counter() - start)
+            return result
+        self.futures[name] = self.pool.submit(run)
+
+    def get(self, name):
+        """等待并返回某个设备的初始化结果（初始化中的异常在这里抛出）"""
+        return self.futures[name].result()
+
+    def mark(self, name):
+        """记录关键时间点（只记录第一次）"""
+        if all(n != name for n, _ in self.marks):
+            self.marks.append((name, perf_counter() - _BOOT))
+
+    def report(self):
+        lines = ["startup timing (ms):"]
+        for name, seconds in sorted(self.timings, key=lambda t: -t[1]):
+            lines.append(f"  {name:<32} {seconds * 1000:8.1f}")
+        for name, since_boot in self.marks:
+            lines.append(f"  @{name:<31} {since_boot * 1000:8.1f}")
+        return "\n".join(lines)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
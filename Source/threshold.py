@@ -1,7 +1,12 @@
 # 导入必要的模块
 
 from maix import image, camera, display, time, touchscreen, app
+from ui_compositor import UICompositor
+from touch_input import TouchInput, HitGrid, TOUCH_PRESS
+from auto_threshold import AutoThreshold
+from cv_bridge import CVBridge
 import math
+import numpy as np
 
 # ------------------ 配置与常量定义（集中管理可配置项） ------------------
 
@@ -35,6 +40,7 @@ class ColorThresholdConfig:
         self.cam = cam
         self.disp = disp
         self.ts = ts
+        self.touch = TouchInput.get_instance(ts)  # 后台轮询的触摸事件源
         self.threshold = threshold[0]
 
         # 状态变量
@@ -46,12 +52,19 @@ class ColorThresholdConfig:
         self.in_binary_mode = False  # 二值化显示模式
         self.exit_flag = False       # 退出标志
         self.selected_param = None   # 当前选中参数
-        self.ui_img = image.Image(SCREEN_WIDTH, SCREEN_HEIGHT)  # UI背景
+        self.changed = False         # 本帧阈值是否被修改
+        self.in_auto_mode = False    # 自动阈值模式：触摸目标后按直方图给出建议
+        self.auto = AutoThreshold()
+        self.bridge = CVBridge.get_instance()
+        self._crop_buf = None        # 二值化预览区域的预分配缓冲区
+        self._crop_img = None        # 与 _crop_buf 共享内存的图像对象
+        self.ui = UICompositor()     # 缓存的UI图层
 
         # 按钮位置存储（key: 按钮标签, value: [x, y, w, h]）
         self.buttons = {
             "exit": None,
             "binary": None,
+            "auto": None,
             "params": {}  # 存储参数按钮: {label: pos}
         }
 
@@ -60,8 +73,8 @@ class ColorThresholdConfig:
 
     def _init_ui(self):
         """初始化UI界面（绘制背景与按钮）"""
-        # 绘制白色背景
-        self.ui_img.draw_rect(0, 0, self.ui_img.width(), self.ui_img.height(), image.COLOR_WHITE)
+        # 绘制白色边框
+        self.ui.add_rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, image.COLOR_WHITE)
 
         # 绘制退出按钮（右上角）
         exit_label = "< Exit"
@@ -84,6 +97,42 @@ class ColorThresholdConfig:
             # 更新偏移量（下一个按钮在当前按钮下方）
             y_offset += self.buttons["params"][label][3]
 
+        # 绘制自动阈值按钮（顶部，参数按钮右侧）
+        max_btn_width = max(btn[2] for btn in self.buttons["params"].values())
+        self.buttons["auto"] = self._draw_button("< Auto", x=max_btn_width + 4, y=0)
+
+        # 预计算二值化显示区域（固定不变，无需每帧计算）
+        top_btn_height = max(self.buttons["exit"][3], self.buttons["binary"][3], self.buttons["auto"][3])
+        self.binary_area = {
+            "x": max_btn_width + 5,
+            "y": top_btn_height + 5,
+            "w": SCREEN_WIDTH - max_btn_width - 10,  # 左右各留5px边距
+            "h": SCREEN_HEIGHT - top_btn_height - 10
+        }
+
+        self._build_hit_grid()
+
+    def _to_screen(self, rect):
+        """UI坐标区域映射到屏幕坐标"""
+        return image.resize_map_pos(
+            SCREEN_WIDTH, SCREEN_HEIGHT,
+            self.disp.width(), self.disp.height(),
+            image.Fit.FIT_CONTAIN, *rect
+        )
+
+    def _build_hit_grid(self):
+        """按屏幕坐标建立命中测试网格（先登记的区域优先）"""
+        self.hit_grid = HitGrid(self.disp.width(), self.disp.height())
+        self.hit_grid.add("exit", self._to_screen(self.buttons["exit"]))
+        self.hit_grid.add("binary", self._to_screen(self.buttons["binary"]))
+        self.hit_grid.add("auto", self._to_screen(self.buttons["auto"]))
+        for label, btn_pos in self.buttons["params"].items():
+            self.hit_grid.add(label, self._to_screen(btn_pos))
+        # 右侧区域：上半屏增大参数，下半屏减小参数
+        half_w, half_h = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+        self.hit_grid.add("inc", self._to_screen([half_w, 0, half_w, half_h]))
+        self.hit_grid.add("dec", self._to_screen([half_w, half_h, half_w, half_h]))
+
     def _get_text_size(self, text):
         """获取文本尺寸（封装重复调用）"""
         return image.string_size(text)
@@ -99,23 +148,15 @@ class ColorThresholdConfig:
         return 2 * BUTTON_MARGIN_Y + text_h
 
     def _draw_button(self, text, x, y):
-        """绘制按钮并返回位置信息 [x, y, w, h]"""
-        text_w, text_h = self._get_text_size(text)
+        """预渲染按钮图层并返回位置信息 [x, y, w, h]"""
         btn_w = self._get_button_width(text)
         btn_h = self._get_button_height(text)
 
-        # 绘制按钮边框
-        self.ui_img.draw_rect(x, y, btn_w, btn_h, image.COLOR_WHITE, 2)
-        # 绘制按钮文本
-        self.ui_img.draw_string(x + BUTTON_MARGIN_X, y + BUTTON_MARGIN_Y,
-                               text, image.COLOR_WHITE)
+        # 按钮边框与文本只渲染一次，之后每帧直接贴图
+        self.ui.add_button(text, x, y, btn_w, btn_h, text,
+                           BUTTON_MARGIN_X, BUTTON_MARGIN_Y)
         return [x, y, btn_w, btn_h]
 
-    def _is_touch_in_button(self, x, y, btn_pos):
-        """判断触摸点是否在按钮区域内"""
-        btn_x, btn_y, btn_w, btn_h = btn_pos
-        return (btn_x < x < btn_x + btn_w) and (btn_y < y < btn_y + btn_h)
-
     def _update_ui_status(self, img):
         """更新UI状态显示（参数值、模式状态）"""
         # 状态显示区域起始Y坐标（参数按钮下方）
@@ -124,114 +165,160 @@ class ColorThresholdConfig:
         # 绘制状态区域背景（白色覆盖）
         img.draw_rect(0, status_y, SCREEN_WIDTH, SCREEN_HEIGHT - status_y, image.COLOR_WHITE)
 
-        # 显示LAB参数值（选中参数标红）
+        # 显示LAB参数值（选中参数标红），文本内容不变时沿用缓存图层
         for i, (param, value) in enumerate(self.lab_params.items()):
             color = image.COLOR_RED if param == self.selected_param else image.COLOR_WHITE
-            img.draw_string(10, status_y + i * 15, f"{param}: {value}", color)
+            self.ui.set_text(param, 10, status_y + i * 15, f"{param}: {value}", color)
 
         # 显示二值化模式状态
         mode_text = "Binary: ON" if self.in_binary_mode else "Binary: OFF"
-        img.draw_string(SCREEN_WIDTH - 100, status_y, mode_text, image.COLOR_BLACK)
+        self.ui.set_text("mode", SCREEN_WIDTH - 100, status_y, mode_text, image.COLOR_BLACK)
+        auto_text = f"Auto: {self.auto.frames}" if self.in_auto_mode else "Auto: OFF"
+        self.ui.set_text("auto", SCREEN_WIDTH - 100, status_y + 15, auto_text, image.COLOR_BLACK)
 
     def _handle_touch(self, x, y):
-        """处理触摸事件（拆分逻辑，减少主循环复杂度）"""
+        """处理一次按下事件（x, y 为屏幕坐标）"""
+        hit = self.hit_grid.hit(x, y)
+
+        # 0. 自动阈值模式下，点击按钮以外的区域选择采样目标
+        if self.in_auto_mode and hit in (None, "inc", "dec"):
+            img_x, img_y = image.resize_map_pos_reverse(
+                SCREEN_WIDTH, SCREEN_HEIGHT,
+                self.disp.width(), self.disp.height(),
+                image.Fit.FIT_CONTAIN, x, y
+            )
+            self.auto.set_point(img_x, img_y, SCREEN_WIDTH, SCREEN_HEIGHT)
+            print(f"自动阈值采样点: ({img_x}, {img_y})")
+            return
+        if hit is None:
+            return
+
         # 1. 检查是否点击退出按钮
-        if self._is_touch_in_button(x, y, self.buttons["exit"]):
+        if hit == "exit":
             self.exit_flag = True
-            return
 
         # 2. 检查是否点击二值化切换按钮
-        if self._is_touch_in_button(x, y, self.buttons["binary"]):
+        elif hit == "binary":
             self.in_binary_mode = not self.in_binary_mode
             print(f"二值化模式: {'开启' if self.in_binary_mode else '关闭'}")
-            return
 
-        # 3. 检查是否点击参数按钮（选中参数）
-        for label, btn_pos in self.buttons["params"].items():
-            if self._is_touch_in_button(x, y, btn_pos):
-                self.selected_param = label[1:]  # 去掉前缀"<"
-                print(f"选中参数: {self.selected_param}")
-                return
+        # 2.1 自动阈值模式切换
+        elif hit == "auto":
+            self.in_auto_mode = not self.in_auto_mode
+            self.auto.roi = None
+            print(f"自动阈值模式: {'开启' if self.in_auto_mode else '关闭'}")
+
+        # 3. 右侧区域触摸（调整选中的参数）
+        elif hit in ("inc", "dec"):
+            if self.selected_param:
+                self._adjust_param(hit == "inc")
 
-        # 4. 右侧区域触摸（调整选中的参数）
-        if x > SCREEN_WIDTH / 2 and self.selected_param:
-            self._adjust_param(y)
+        # 4. 参数按钮（选中参数）
+        else:
+            self.selected_param = hit[1:]  # 去掉前缀"<"
+            print(f"选中参数: {self.selected_param}")
 
-    def _adjust_param(self, touch_y):
-        """根据触摸Y坐标调整参数（上半部分增大，下半部分减小）"""
+    def _adjust_param(self, increase):
+        """调整选中参数（increase 为 True 时增大，否则减小）"""
         param = self.selected_param
         min_val, max_val = PARAM_RANGES[param]
 
         # 上半屏触摸：增大参数；下半屏触摸：减小参数
-        if touch_y < SCREEN_HEIGHT / 2:
+        if increase:
             new_val = self.lab_params[param] + ADJUST_STEP
         else:
             new_val = self.lab_params[param] - ADJUST_STEP
 
         # 限制在有效范围内
-        self.lab_params[param] = max(min_val, min(new_val, max_val))
+        new_val = max(min_val, min(new_val, max_val))
+        if new_val != self.lab_params[param]:
+            self.lab_params[param] = new_val
+            self.changed = True
         print(f"{param} = {self.lab_params[param]}")
 
+    def _apply_suggestion(self, suggestion):
+        """把自动阈值建议写入参数"""
+        if suggestion is None:
+            return
+        for param, value in zip(("L_min", "L_max", "A_min", "A_max", "B_min", "B_max"), suggestion):
+            if self.lab_params[param] != value:
+                self.lab_params[param] = value
+                self.changed = True
+
+    def _draw_binary_preview(self, img):
+        """只把二值化区域拷入预分配缓冲区并原地二值化，不拷贝整帧"""
+        area = self.binary_area
+        x, y, w, h = area["x"], area["y"], area["w"], area["h"]
+        src = self.bridge.view(img)
+        buf = self.bridge.scratch("binary_preview", (h, w) + src.shape[2:])
+        if buf is not self._crop_buf:
+            self._crop_buf = buf
+            self._crop_img = image.cv2image(buf, False, False)
+        np.copyto(self._crop_buf, src[y:y + h, x:x + w])
+        self._crop_img.binary(self.get_threshold())  # 应用阈值
+        img.draw_image(x, y, self._crop_img)  # 绘制二值化图像
+        # 绘制红色边框标记二值化区域
+        img.draw_rect(x, y, w, h, image.COLOR_RED, 1)
+
+    def get_threshold(self):
+        """返回当前阈值（每次返回新列表，可直接整体替换检测器阈值）"""
+        return [[
+            self.lab_params["L_min"], self.lab_params["L_max"],
+            self.lab_params["A_min"], self.lab_params["A_max"],
+            self.lab_params["B_min"], self.lab_params["B_max"]
+        ]]
+
+    def finished(self):
+        """是否已点击退出"""
+        return self.exit_flag
+
+    def step(self, img):
+        """
+        处理一帧调参交互并把预览与UI叠加到 img 上（非阻塞，由主循环每帧调用）
+        :param img: 当前帧图像，调用方应已在其上完成检测（预览直接读取其原始像素，不做整帧拷贝）
+        :return: 本帧阈值是否发生变化
+        """
+        # 处理触摸事件（后台线程已去抖，只响应按下）
+        self.changed = False
+        for event, touch_x, touch_y, _ in self.touch.get_events():
+            if event == TOUCH_PRESS:
+                self._handle_touch(touch_x, touch_y)
+        if self.exit_flag:
+            # 丢弃退出时残留的触摸事件，避免传给菜单
+            self.touch.clear()
+
+        # 自动阈值：累加本帧采样区域直方图并应用建议值
+        if self.in_auto_mode and self.auto.update(img):
+            self._apply_suggestion(self.auto.suggest())
+
+        # 二值化模式处理（在任何绘制之前进行，读取的是原始像素）
+        if self.in_binary_mode:
+            self._draw_binary_preview(img)
+
+        if self.in_auto_mode:
+            self.auto.draw(img)
+
+        # 更新UI状态显示
+        self._update_ui_status(img)
+        # 贴上缓存的UI图层（只涉及控件区域）
+        self.ui.compose(img)
+        return self.changed
+
     def run_threshold_adjust(self):
-        """运行阈值调整模式（主交互逻辑）"""
+        """运行阈值调整模式（阻塞，单独调参时使用）"""
         print("阈值调整模式：")
         print(" - 点击< Binary切换二值化显示")
         print(" - 点击< Exit退出调整")
         print(" - 点击参数按钮选择参数，右侧触摸调整值")
 
-        # 预计算二值化显示区域（固定不变，无需每次循环计算）
-        max_btn_width = max(btn[2] for btn in self.buttons["params"].values())
-        top_btn_height = max(self.buttons["exit"][3], self.buttons["binary"][3])
-        binary_area = {
-            "x": max_btn_width + 5,
-            "y": top_btn_height + 5,
-            "w": SCREEN_WIDTH - max_btn_width - 10,  # 左右各留5px边距
-            "h": SCREEN_HEIGHT - top_btn_height - 10
-        }
-
         while not self.exit_flag:
             # 读取摄像头图像
             img = self.cam.read()
-            original_img = img.copy()  # 保存原始图像
-            # 绘制UI背景
-            img.draw_image(0, 0, self.ui_img)
-
-            # 二值化模式处理
-            current_threshold = (
-                self.lab_params["L_min"], self.lab_params["L_max"],
-                self.lab_params["A_min"], self.lab_params["A_max"],
-                self.lab_params["B_min"], self.lab_params["B_max"]
-            )
-            if self.in_binary_mode:
-                # 裁剪显示区域并二值化
-                crop = original_img.crop(
-                    binary_area["x"], binary_area["y"],
-                    binary_area["w"], binary_area["h"]
-                )
-                crop.binary([current_threshold])  # 应用阈值
-                img.draw_image(binary_area["x"], binary_area["y"], crop)  # 绘制二值化图像
-                # 绘制红色边框标记二值化区域
-                img.draw_rect(binary_area["x"], binary_area["y"],
-                             binary_area["w"], binary_area["h"],
-                             image.COLOR_RED, 1)
-
-            # 处理触摸事件
-            touch_x, touch_y, pressed = self.ts.read()
-            if pressed:
-                # 转换触摸坐标到屏幕坐标系
-                adjusted_x, adjusted_y = image.resize_map_pos_reverse(
-                    SCREEN_WIDTH, SCREEN_HEIGHT,
-                    self.disp.width(), self.disp.height(),
-                    image.Fit.FIT_CONTAIN, touch_x, touch_y
-                )
-                self._handle_touch(adjusted_x, adjusted_y)
-
-            # 更新UI状态显示
-            self._update_ui_status(img)
+            self.step(img)
             # 显示图像
             self.disp.show(img)
 
-        return [list(current_threshold)]
+        return self.get_threshold()
 
     def run_blob_detection(self, threshold):
         """运行色块检测模式（调整完成后）"""
@@ -0,0 +1,136 @@
+from maix import time, app
+from collections import deque
+import threading
+
+# 触摸事件类型
+TOUCH_PRESS = 0
+TOUCH_RELEASE = 1
+TOUCH_DRAG = 2
+
+
+class TouchInput:
+    POLL_MS = 10        # 轮询周期（毫秒）
+    DEBOUNCE_MS = 30    # 按下/抬起状态需稳定的时间（毫秒）
+    DRAG_DIST = 4       # 按住时移动超过该距离（像素）才产生拖动事件
+    QUEUE_SIZE = 32     # 事件队列长度，满了丢弃最旧的事件
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, ts):
+        """同一触摸屏只允许一个后台轮询线程"""
+        if cls._instance is None:
+            cls._instance = cls(ts)
+            cls._instance.start()
+        return cls._instance
+
+    def __init__(self, ts, poll_ms=POLL_MS, debounce_ms=DEBOUNCE_MS):
+        """
+        后台轮询触摸屏，产生去抖后的 按下/抬起/拖动 事件
+        :param ts: touchscreen.TouchScreen 对象
+        :param poll_ms: 轮询周期（毫秒）
+        :param debounce_ms: 去抖时间（毫秒）
+        """
+        self.ts = ts
+        self.poll_ms = poll_ms
+        self.debounce_ms = debounce_ms
+        self.events = deque(maxlen=self.QUEUE_SIZE)  # (类型, x, y, 时间戳)
+        self.pressed = False
+        self.pos = (0, 0)
+        self._raw_pressed = False
+        self._raw_since = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running and not app.need_exit():
+            x, y, pressed = self.ts.read()
+            self._process(x, y, bool(pressed), time.ticks_ms())
+            time.sleep_ms(self.poll_ms)
+
+    def _process(self, x, y, pressed, now):
+        """处理一次原始采样（去抖 + 事件生成）"""
+        if pressed != self._raw_pressed:
+            self._raw_pressed = pressed
+            self._raw_since = now
+        stable = now - self._raw_since >= self.debounce_ms
+
+        if pressed != self.pressed and stable:
+            self.pressed = pressed
+            if pressed:
+                self.pos = (x, y)
+                self.events.append((TOUCH_PRESS, x, y, now))
+            else:
+                self.events.append((TOUCH_RELEASE, self.pos[0], self.pos[1], now))
+        elif pressed and self.pressed:
+            if abs(x - self.pos[0]) >= self.DRAG_DIST or abs(y - self.pos[1]) >= self.DRAG_DIST:
+                self.pos = (x, y)
+                self.events.append((TOUCH_DRAG, x, y, now))
+
+    def get_events(self):
+        """取出队列中所有事件"""
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+    def clear(self):
+        """丢弃尚未处理的事件"""
+        self.events.clear()
+
+
+class HitGrid:
+    CELL = 16   # 网格单元大小（像素）
+
+    def __init__(self, width, height, cell=CELL):
+        """
+        按钮命中测试网格索引，布局确定时构建一次，查询只检查触摸点所在单元
+        :param width: 坐标空间宽度（屏幕坐标）
+        :param height: 坐标空间高度
+        :param cell: 网格单元大小
+        """
+        self.cell = cell
+        self.cols = (width + cell - 1) // cell
+        self.rows = (height + cell - 1) // cell
+        self.grid = [[] for _ in range(self.cols * self.rows)]
+        self.rects = {}
+
+    def add(self, name, rect):
+        """
+        登记一个区域，重叠时先登记的优先
+        :param rect: [x, y, w, h]
+        """
+        x, y, w, h = rect
+        self.rects[name] = (x, y, w, h)
+        c0 = max(0, x // self.cell)
+        c1 = min(self.cols - 1, (x + w) // self.cell)
+        r0 = max(0, y // self.cell)
+        r1 = min(self.rows - 1, (y + h) // self.cell)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                self.grid[r * self.cols + c].append(name)
+
+    def hit(self, x, y):
+        """返回触摸点命中的区域名，未命中返回 None"""
+        c = x // self.cell
+        r = y // self.cell
+        if c < 0 or r < 0 or c >= self.cols or r >= self.rows:
+            return None
+        for name in self.grid[r * self.cols + c]:
+            bx, by, bw, bh = self.rects[name]
+            if bx < x < bx + bw and by < y < by + bh:
+                return name
+        return None
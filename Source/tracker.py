@@ -0,0 +1,141 @@
+class Track:
+    def __init__(self, track_id, x, y, w=0, h=0):
+        """单个目标轨迹（alpha-beta 滤波，速度单位：像素/帧）"""
+        self.id = track_id
+        self.x = float(x)
+        self.y = float(y)
+        self.vx = 0.0
+        self.vy = 0.0
+        self.w = w
+        self.h = h
+        self.hits = 1      # 累计匹配次数
+        self.missed = 0    # 连续未匹配帧数
+
+    def predict(self):
+        """按速度预测本帧位置"""
+        return self.x + self.vx, self.y + self.vy
+
+    def correct(self, x, y, alpha, beta):
+        """用本帧测量值修正位置与速度"""
+        px, py = self.predict()
+        rx, ry = x - px, y - py
+        self.x = px + alpha * rx
+        self.y = py + alpha * ry
+        self.vx += beta * rx
+        self.vy += beta * ry
+
+    def center(self):
+        return int(self.x), int(self.y)
+
+    def area(self):
+        return self.w * self.h
+
+
+class MultiTargetTracker:
+    GATE = 30          # 匹配门限（像素）
+    MAX_MISSED = 5     # 连续丢失多少帧后删除轨迹
+    MIN_HITS = 3       # 匹配次数达到该值才认为轨迹稳定
+    CELL = 32          # 空间网格单元大小（像素），应不小于 GATE
+    ALPHA = 0.6        # 位置修正系数
+    BETA = 0.2         # 速度修正系数
+
+    def __init__(self, gate=GATE, max_missed=MAX_MISSED, min_hits=MIN_HITS):
+        """
+        多目标跟踪器：跨帧为色块分配稳定ID
+        候选匹配只在空间网格的相邻单元内查找，再按距离贪心分配
+        :param gate: 匹配门限（像素）
+        :param max_missed: 连续丢失多少帧后删除轨迹
+        :param min_hits: 稳定轨迹所需的匹配次数
+        """
+        self.gate = gate
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.cell = max(self.CELL, gate)
+        self.tracks = []
+        self.next_id = 0
+        self.ids_changed = False   # 本帧轨迹集合是否有增删
+
+    def update(self, detections):
+        """
+        输入本帧检测结果，返回当前所有轨迹
+        :param detections: [(cx, cy, w, h)] 或 [(cx, cy)]
+        """
+        # 检测点放入空间网格
+        cell = self.cell
+        grid = {}
+        for i, det in enumerate(detections):
+            grid.setdefault((int(det[0]) // cell, int(det[1]) // cell), []).append(i)
+
+        # 在预测位置周围 3x3 单元内收集门限内的候选对
+        gate2 = self.gate * self.gate
+        pairs = []
+        for t_idx, track in enumerate(self.tracks):
+            px, py = track.predict()
+            gx, gy = int(px) // cell, int(py) // cell
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for d_idx in grid.get((gx + dx, gy + dy), ()):
+                        ex = detections[d_idx][0] - px
+                        ey = detections[d_idx][1] - py
+                        dist2 = ex * ex + ey * ey
+                        if dist2 <= gate2:
+                            pairs.append((dist2, t_idx, d_idx))
+
+        # 按距离贪心匹配
+        pairs.sort()
+        track_used = [False] * len(self.tracks)
+        det_used = [False] * len(detections)
+        for _, t_idx, d_idx in pairs:
+            if track_used[t_idx] or det_used[d_idx]:
+                continue
+            track_used[t_idx] = True
+            det_used[d_idx] = True
+            track = self.tracks[t_idx]
+            det = detections[d_idx]
+            track.correct(det[0], det[1], self.ALPHA, self.BETA)
+            if len(det) >= 4:
+                track.w, track.h = det[2], det[3]
+            track.hits += 1
+            track.missed = 0
+
+        # 未匹配的轨迹按预测位置外推，超时删除
+        self.ids_changed = False
+        alive = []
+        for t_idx, track in enumerate(self.tracks):
+            if not track_used[t_idx]:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    self.ids_changed = True
+                    continue
+                track.x, track.y = track.predict()
+            alive.append(track)
+
+        # 未匹配的检测新建轨迹
+        for d_idx, det in enumerate(detections):
+            if not det_used[d_idx]:
+                w, h = (det[2], det[3]) if len(det) >= 4 else (0, 0)
+                alive.append(Track(self.next_id, det[0], det[1], w, h))
+                self.next_id += 1
+                self.ids_changed = True
+
+        self.tracks = alive
+        return self.tracks
+
+    def confirmed(self, coasting=False):
+        """
+        返回稳定轨迹（匹配次数足够）
+        :param coasting: 是否包含本帧暂时丢失、仍按预测外推的轨迹
+        """
+        return [t for t in self.tracks
+                if t.hits >= self.min_hits and (coasting or t.missed == 0)]
+
+    def get(self, track_id):
+        """按ID查找轨迹，不存在返回 None"""
+        for track in self.tracks:
+            if track.id == track_id:
+                return track
+        return None
+
+    def clear(self):
+        self.tracks = []
+        self.ids_changed = True
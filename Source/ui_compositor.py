@@ -0,0 +1,59 @@
+from maix import image
+
+
+class UICompositor:
+    def __init__(self):
+        """
+        UI合成器：静态控件只渲染一次到带透明通道的小图层，每帧只贴控件所在区域；
+        动态文本按内容缓存，内容不变时不重新渲染
+        """
+        self.rects = []      # 静态边框 [(x, y, w, h, color, thickness)]
+        self.sprites = {}    # 静态图层 {name: (x, y, sprite)}
+        self.texts = {}      # 动态文本 {name: [x, y, text, color, sprite]}
+        self.redraws = 0     # 动态文本重新渲染次数
+
+    def _new_sprite(self, w, h):
+        """创建全透明的 RGBA 图层（贴图时按透明通道混合）"""
+        return image.Image(w, h, image.Format.FMT_RGBA8888, bg=image.Color.from_rgba(0, 0, 0, 0))
+
+    def add_rect(self, x, y, w, h, color, thickness=1):
+        """登记静态边框（直接绘制，只涉及边框像素）"""
+        self.rects.append((x, y, w, h, color, thickness))
+
+    def add_button(self, name, x, y, w, h, text, text_x, text_y, color=image.COLOR_WHITE, thickness=2):
+        """
+        预渲染按钮（边框 + 文字）为图层
+        :param text_x: 文字相对按钮左上角的x偏移
+        :param text_y: 文字相对按钮左上角的y偏移
+        """
+        sprite = self._new_sprite(w, h)
+        sprite.draw_rect(0, 0, w, h, color, thickness)
+        sprite.draw_string(text_x, text_y, text, color)
+        self.sprites[name] = (x, y, sprite)
+
+    def set_text(self, name, x, y, text, color=image.COLOR_WHITE):
+        """设置动态文本，只有内容或颜色变化时才重新渲染"""
+        entry = self.texts.get(name)
+        if entry and entry[2] == text and entry[3] == color:
+            entry[0], entry[1] = x, y
+            return False
+        size = image.string_size(text)
+        sprite = self._new_sprite(size.width(), size.height())
+        sprite.draw_string(0, 0, text, color)
+        self.texts[name] = [x, y, text, color, sprite]
+        self.redraws += 1
+        return True
+
+    def remove(self, name):
+        """移除图层或动态文本"""
+        self.sprites.pop(name, None)
+        self.texts.pop(name, None)
+
+    def compose(self, img):
+        """把缓存的UI贴到当前帧（只涉及控件区域）"""
+        for x, y, w, h, color, thickness in self.rects:
+            img.draw_rect(x, y, w, h, color, thickness)
+        for x, y, sprite in self.sprites.values():
+            img.draw_image(x, y, sprite)
+        for x, y, _, _, sprite in self.texts.values():
+            img.draw_image(x, y, sprite)
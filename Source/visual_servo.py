@@ -0,0 +1,249 @@
+from maix import image, time
+from blob_detect import BlobDetector
+from pid import PIDIncrementalController
+
+
+def compute_homography(src, dst):
+    """
+    由4组对应点求单应矩阵（src -> dst）
+    :param src: 源点 [(x, y)] * 4
+    :param dst: 目标点 [(u, v)] * 4
+    :return: 3x3 矩阵（行优先列表），退化时返回 None
+    """
+    # 构造 8x9 增广矩阵，h33 固定为 1
+    rows = []
+    for (x, y), (u, v) in zip(src, dst):
+        rows.append([x, y, 1.0, 0.0, 0.0, 0.0, -u * x, -u * y, u])
+        rows.append([0.0, 0.0, 0.0, x, y, 1.0, -v * x, -v * y, v])
+
+    # 高斯消元（列主元）
+    n = 8
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-9:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        p = rows[col][col]
+        for r in range(n):
+            if r != col:
+                f = rows[r][col] / p
+                if f:
+                    for c in range(col, n + 1):
+                        rows[r][c] -= f * rows[col][c]
+    h = [rows[i][n] / rows[i][i] for i in range(n)]
+    return [h[0:3], h[3:6], [h[6], h[7], 1.0]]
+
+
+def apply_homography(H, x, y):
+    """用单应矩阵变换一个点"""
+    w = H[2][0] * x + H[2][1] * y + H[2][2]
+    if w == 0:
+        return None
+    return ((H[0][0] * x + H[0][1] * y + H[0][2]) / w,
+            (H[1][0] * x + H[1][1] * y + H[1][2]) / w)
+
+
+class SpotPredictor:
+    def __init__(self, alpha=0.6, beta=0.2, max_missed=5):
+        """
+        alpha-beta 滤波器，估计激光点速度并做延迟补偿预测
+        :param alpha: 位置修正系数
+        :param beta: 速度修正系数
+        :param max_missed: 连续丢失多少帧后重置
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.max_missed = max_missed
+        self.reset()
+
+    def reset(self):
+        self.pos = None
+        self.vel = (0.0, 0.0)   # 单位/毫秒
+        self.last_time = 0
+        self.missed = 0
+
+    def update(self, pos, now):
+        """输入新的测量值，返回滤波后的位置"""
+        if self.pos is None:
+            self.pos = pos
+            self.vel = (0.0, 0.0)
+            self.last_time = now
+            self.missed = 0
+            return self.pos
+
+        dt = now - self.last_time
+        if dt <= 0:
+            dt = 1
+        # 先按速度外推，再用测量残差修正
+        px = self.pos[0] + self.vel[0] * dt
+        py = self.pos[1] + self.vel[1] * dt
+        rx = pos[0] - px
+        ry = pos[1] - py
+        self.pos = (px + self.alpha * rx, py + self.alpha * ry)
+        self.vel = (self.vel[0] + self.beta * rx / dt, self.vel[1] + self.beta * ry / dt)
+        self.last_time = now
+        self.missed = 0
+        return self.pos
+
+    def miss(self):
+        """本帧未检测到激光点"""
+        self.missed += 1
+        if self.missed > self.max_missed:
+            self.reset()
+
+    def predict(self, latency_ms):
+        """预测 latency_ms 之后的位置"""
+        if self.pos is None:
+            return None
+        return (self.pos[0] + self.vel[0] * latency_ms,
+                self.pos[1] + self.vel[1] * latency_ms)
+
+
+class VisualServo:
+    RECT_SIZE = (100, 100)   # 矩形坐标系尺寸（角点依次映射到四个角）
+    LATENCY_MS = 60          # 曝光到舵机响应的总延迟（毫秒）
+    ARRIVE_DIST = 2          # 到达判定距离（矩形坐标单位）
+    SETTLE_MS = 400          # 前馈后等待舵机到位的时间（毫秒），期间不运行 PID
+
+    def __init__(self, servos, spot_threshold, rect_size=RECT_SIZE, latency_ms=LATENCY_MS):
+        """
+        激光-目标视觉伺服：同一帧内检测激光点与矩形角点，在矩形单应坐标系中闭环
+        :param servos: ServoGroup，通道顺序为 [180舵机(y), 270舵机(x)]
+        :param spot_threshold: 激光点LAB阈值 [(Lmin, Lmax, Amin, Amax, Bmin, Bmax)]
+        :param rect_size: 矩形坐标系宽高
+        :param latency_ms: 延迟补偿时间（毫秒）
+        """
+        self.servos = servos
+        self.spot_detector = BlobDetector(spot_threshold, 5)
+        self.rect_size = rect_size
+        self.latency_ms = latency_ms
+        self.predictor = SpotPredictor()
+
+        self.pid_x = PIDIncrementalController(0.08, 0.035, 0.1, 0)
+        self.pid_x.limit(5)
+        self.pid_y = PIDIncrementalController(0.1, 0.03, 0, 0)
+        self.pid_y.limit(5)
+        self.set_target(rect_size[0] / 2, rect_size[1] / 2)
+
+        self.H = None           # 像素 -> 矩形坐标
+        self.H_inv = None       # 矩形坐标 -> 像素
+        self.spot = None        # 激光点像素坐标
+        self.spot_rect = None   # 激光点矩形坐标（已做延迟补偿）
+        self.error = None       # 矩形坐标系误差
+        self.undistorter = None # 镜头去畸变（Undistorter），None 表示直接使用原始像素坐标
+        self.aim_model = None   # 像素 -> 舵机角度映射（AimModel），目标变化时前馈直接瞄准
+        self._aim_pending = True
+        self._settle_until = None   # 前馈后舵机到位的时刻，None 表示不在等待
+
+    def set_gains(self, gains_x, gains_y):
+        """设置两轴PID参数 (P, I, D)"""
+        self.pid_x.Kp, self.pid_x.Ki, self.pid_x.Kd = gains_x
+        self.pid_y.Kp, self.pid_y.Ki, self.pid_y.Kd = gains_y
+
+    def set_target(self, u, v):
+        """设置目标点（矩形坐标系）"""
+        self.target = (u, v)
+        self.pid_x.set_point(u)
+        self.pid_y.set_point(v)
+        self._aim_pending = True
+
+    def set_corners(self, corners):
+        """根据矩形四个角点更新单应矩阵"""
+        w, h = self.rect_size
+        rect_pts = [(0, 0), (w, 0), (w, h), (0, h)]
+        H = compute_homography(corners, rect_pts)
+        if H is None:
+            return False
+        self.H = H
+        self.H_inv = compute_homography(rect_pts, corners)
+        return True
+
+    def target_pixel(self):
+        """目标点在原始图像中的像素坐标（用于显示）"""
+        if self.H_inv is None:
+            return None
+        pos = apply_homography(self.H_inv, *self.target)
+        if pos is not None and self.undistorter is not None:
+            pos = self.undistorter.distort_point(*pos)
+        return pos
+
+    def arrived(self):
+        """是否已到达目标点"""
+        if self.error is None:
+            return False
+        return abs(self.error[0]) < self.ARRIVE_DIST and abs(self.error[1]) < self.ARRIVE_DIST
+
+    def update(self, img, corners=None):
+        """
+        处理一帧：检测激光点、变换到矩形坐标、PID驱动舵机
+        :param img: 当前帧图像
+        :param corners: 本帧矩形角点，None 时沿用上一次的单应矩阵
+        :return: 激光点像素坐标，未检测到返回 None
+        """
+        # 角点与激光点都在去畸变坐标系中参与计算
+        if corners and len(corners) == 4:
+            if self.undistorter is not None:
+                corners = self.undistorter.points(corners)
+            self.set_corners(corners)
+
+        if self._aim_pending and self.aim_model is not None and self.H_inv is not None:
+            # 前馈：按映射模型直接转到目标点，之后 PID 只修正残差
+            if self.feedforward():
+                # 本帧图像拍摄于舵机转动之前，激光点已失效
+                self.spot = None
+                return None
+
+        spot, _, _ = self.spot_detector.detect_max_blob(img)
+        self.spot = spot
+        if self._settle_until is not None:
+            # 舵机仍在转向前馈角度，此时的激光点不能作为反馈
+            if time.ticks_ms() < self._settle_until:
+                return spot
+            self._settle_until = None
+        if spot is None or self.H is None:
+            self.predictor.miss()
+            return None
+
+        pos = self.undistorter.point(*spot) if self.undistorter is not None else spot
+        spot_rect = apply_homography(self.H, pos[0], pos[1])
+        if spot_rect is None:
+            self.predictor.miss()
+            return spot
+
+        # 延迟补偿：用预测位置作为反馈
+        self.predictor.update(spot_rect, time.ticks_ms())
+        self.spot_rect = self.predictor.predict(self.latency_ms)
+        self.error = (self.target[0] - self.spot_rect[0], self.target[1] - self.spot_rect[1])
+
+        self.pid_x.update(self.spot_rect[0])
+        self.pid_y.update(self.spot_rect[1])
+        angle_180, angle_270 = self.servos.get_angles()
+        self.servos.set_angles((angle_180 - self.pid_y.output, angle_270 - self.pid_x.output))
+        return spot
+
+    def feedforward(self):
+        """由目标点像素坐标直接计算并发送舵机角度，清空 PID 与预测器状态，舵机到位前暂停闭环"""
+        pos = apply_homography(self.H_inv, *self.target)
+        if pos is None:
+            return False
+        self.servos.set_angles(self.aim_model.angles_for(*pos))
+        for pid, sp in ((self.pid_x, self.target[0]), (self.pid_y, self.target[1])):
+            pid.clear()
+            pid.set_point(sp)
+        self.predictor.reset()
+        self._aim_pending = False
+        self._settle_until = time.ticks_ms() + self.SETTLE_MS
+        return True
+
+    def draw(self, img, map_point=None):
+        """
+        绘制激光点与目标点
+        :param map_point: 检测坐标到显示坐标的映射函数，None 表示两者相同
+        """
+        if self.spot:
+            x, y = map_point(*self.spot) if map_point else self.spot
+            img.draw_cross(x, y, image.COLOR_RED, 5, 1)
+        target = self.target_pixel()
+        if target:
+            x, y = map_point(*target) if map_point else target
+            img.draw_circle(int(x), int(y), 4, image.COLOR_YELLOW)
@@ -0,0 +1,122 @@
+# path_planner.py - 预计算路径规划（弧长参数化 + 等速重采样）
+import math
+import numpy as np
+
+
+class PathPlanner:
+    ARC_SEGMENTS = 6     # 每个圆角的插值段数
+
+    def __init__(self, points, closed=True, speed=40.0, step=1.0, corner_radius=0.0):
+        """
+        预计算路径，按弧长参数化并等间距重采样，路径只在模式开始时生成一次
+        :param points: 路径顶点 [(x, y), ...]
+        :param closed: 是否首尾相连
+        :param speed: 目标点移动速度（像素/秒）
+        :param step: 重采样间距（像素）
+        :param corner_radius: 拐角圆角半径（像素），0 表示不倒角
+        """
+        self.closed = closed
+        self.speed = float(speed)
+        self.step = float(step)
+
+        vertices = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        if len(vertices) == 0:
+            raise ValueError("路径至少需要1个点")
+        if closed and len(vertices) > 1 and np.allclose(vertices[0], vertices[-1]):
+            vertices = vertices[:-1]  # 去掉重复的闭合点
+        if corner_radius > 0 and len(vertices) >= 3:
+            vertices = self._round_corners(vertices, corner_radius)
+        if closed and len(vertices) > 1:
+            vertices = np.vstack((vertices, vertices[:1]))
+        self.vertices = vertices
+
+        # 累计弧长
+        if len(vertices) > 1:
+            seg_len = np.hypot(*np.diff(vertices, axis=0).T)
+            arc = np.concatenate(([0.0], np.cumsum(seg_len))).astype(np.float32)
+        else:
+            arc = np.zeros(1, np.float32)
+        self.length = float(arc[-1])
+
+        # 等弧长重采样，查询时直接按下标取点
+        count = max(2, int(math.ceil(self.length / self.step)) + 1)
+        s = np.linspace(0.0, self.length, count, dtype=np.float32)
+        self.samples = np.empty((count, 2), np.float32)
+        self.samples[:, 0] = np.interp(s, arc, vertices[:, 0])
+        self.samples[:, 1] = np.interp(s, arc, vertices[:, 1])
+        self._sample_step = self.length / (count - 1) if self.length > 0 else 1.0
+
+    def _round_corners(self, vertices, radius):
+        """将每个拐角替换为圆弧（半径受相邻边长度限制）"""
+        n = len(vertices)
+        last = n if self.closed else n - 1
+        out = [] if self.closed else [vertices[0]]
+        for i in range(0 if self.closed else 1, last):
+            p = vertices[i]
+            a = vertices[(i - 1) % n] - p
+            b = vertices[(i + 1) % n] - p
+            la = float(np.hypot(*a))
+            lb = float(np.hypot(*b))
+            if la == 0 or lb == 0:
+                out.append(p)
+                continue
+            ua, ub = a / la, b / lb
+            cos_t = max(-1.0, min(1.0, float(np.dot(ua, ub))))
+            theta = math.acos(cos_t)  # 拐角内角
+            if theta < 1e-3 or math.pi - theta < 1e-3:
+                out.append(p)
+                continue
+            # 切点到顶点的距离，不超过相邻边长的一半
+            tan_half = math.tan(theta / 2)
+            d = min(radius / tan_half, la / 2, lb / 2)
+            r = d * tan_half
+            start = p + ua * d
+            end = p + ub * d
+            bisector = ua + ub
+            center = p + bisector / float(np.hypot(*bisector)) * (r / math.sin(theta / 2))
+            a0 = math.atan2(start[1] - center[1], start[0] - center[0])
+            a1 = math.atan2(end[1] - center[1], end[0] - center[0])
+            sweep = (a1 - a0 + math.pi) % (2 * math.pi) - math.pi
+            for k in range(self.ARC_SEGMENTS + 1):
+                ang = a0 + sweep * k / self.ARC_SEGMENTS
+                out.append((center[0] + r * math.cos(ang), center[1] + r * math.sin(ang)))
+        if not self.closed:
+            out.append(vertices[-1])
+        return np.asarray(out, dtype=np.float32)
+
+    def duration(self):
+        """以设定速度走完一圈所需时间（秒）"""
+        return self.length / self.speed if self.speed > 0 else 0.0
+
+    def point_at(self, s):
+        """按弧长取路径上的点（线性插值相邻采样点）"""
+        if self.length <= 0:
+            return float(self.samples[0, 0]), float(self.samples[0, 1])
+        if self.closed:
+            s %= self.length
+        else:
+            s = min(max(s, 0.0), self.length)
+        f = s / self._sample_step
+        i = min(int(f), len(self.samples) - 2)
+        r = f - i
+        x0, y0 = self.samples[i]
+        x1, y1 = self.samples[i + 1]
+        return float(x0 + (x1 - x0) * r), float(y0 + (y1 - y0) * r)
+
+    def target_at(self, t):
+        """
+        移动目标查询
+        :param t: 从起点出发经过的时间（秒）
+        :return: 该时刻目标点坐标 (x, y)
+        """
+        return self.point_at(t * self.speed)
+
+    def finished(self, t):
+        """单圈是否已走完"""
+        return t >= self.duration()
+
+    def draw(self, img, color, thickness=1):
+        """绘制路径折线（只画顶点连线，不逐点绘制采样点）"""
+        v = self.vertices
+        for i in range(len(v) - 1):
+            img.draw_line(int(v[i][0]), int(v[i][1]), int(v[i + 1][0]), int(v[i + 1][1]), color, thickness)
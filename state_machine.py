@@ -0,0 +1,77 @@
+# state_machine.py - 模式状态机（进入/退出钩子 + 切换时间戳）
+import time
+
+
+class State:
+    def __init__(self, name, enter=None, step=None, exit=None):
+        """
+        单个模式
+        :param name: 模式名称
+        :param enter: 进入时调用一次，完成路径生成、缓冲区分配等准备工作
+        :param step: 每帧调用，返回另一个模式名称时自动切换
+        :param exit: 离开时调用一次
+        """
+        self.name = name
+        self.enter = enter
+        self.step = step
+        self.exit = exit
+
+
+class StateMachine:
+    HISTORY = 32   # 保留的切换记录条数
+
+    def __init__(self, initial="IDLE", history=HISTORY):
+        """
+        模式状态机：模式切换只执行一次准备工作，每帧只运行当前模式的 step
+        每次切换记录 (时间戳ms, 原模式, 新模式, 原因, 进入耗时ms)，用于延迟分析
+        :param initial: 初始模式（无钩子的空模式）
+        :param history: 保留的切换记录条数
+        """
+        self.states = {initial: State(initial)}
+        self.current = self.states[initial]
+        self.entered_ms = time.ticks_ms()
+        self.history = history
+        self.transitions = []
+
+    def add(self, name, enter=None, step=None, exit=None):
+        """登记模式"""
+        self.states[name] = State(name, enter, step, exit)
+
+    @property
+    def mode(self):
+        return self.current.name
+
+    def transition(self, name, reason=None, enter=True):
+        """
+        切换模式（切换到当前模式时重新进入，重置该模式的准备工作）
+        :param name: 新模式名称
+        :param reason: 切换原因，如串口指令
+        :param enter: 是否调用新模式的进入钩子；False 时沿用该模式之前的进度继续执行
+        """
+        if name not in self.states:
+            raise ValueError(f"未知模式: {name}")
+        now = time.ticks_ms()
+        old = self.current
+        if old.exit:
+            old.exit()
+        self.current = self.states[name]
+        if enter and self.current.enter:
+            self.current.enter()
+        self.entered_ms = time.ticks_ms()
+        record = (now, old.name, name, reason, time.ticks_diff(self.entered_ms, now))
+        self.transitions.append(record)
+        if len(self.transitions) > self.history:
+            self.transitions.pop(0)
+        print("MODE {} -> {} ({}) {}ms".format(old.name, name, reason, record[4]))
+
+    def step(self, *args):
+        """运行当前模式的每帧工作"""
+        if self.current.step is None:
+            return
+        next_mode = self.current.step(*args)
+        if next_mode is not None and next_mode != self.current.name:
+            self.transition(next_mode, reason="done")
+
+    def time_in_mode(self):
+        """当前模式已持续的时间（毫秒）"""
+        return time.ticks_diff(time.ticks_ms(), self.entered_ms)